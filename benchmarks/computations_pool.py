@@ -0,0 +1,42 @@
+import timeit
+
+import numpy as np
+
+from features.camera import Camera
+from features.intersection import ComputationsPool, Intersection
+from features.matrix import view_transform
+from features.ray import Ray
+from features.tuple import Point, Vector
+from features.world import World
+
+
+def unpooled(i, r):
+    return i.prepare_computations(r)
+
+
+def pooled(i, r, pool):
+    pool.release(i.prepare_computations(r, pool=pool))
+
+
+if __name__ == "__main__":
+    w = World.default()
+    w.objects[1].material.reflective = 0.5
+    i = Intersection(4, w.objects[0])
+    r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+    pool = ComputationsPool()
+    n = 100000
+
+    fresh = min(timeit.repeat(lambda: unpooled(i, r), number=n, repeat=5))
+    reused = min(timeit.repeat(lambda: pooled(i, r, pool), number=n, repeat=5))
+
+    print(f"prepare_computations:        {fresh / n * 1e6:.2f} us per hit")
+    print(f"pooled prepare_computations: {reused / n * 1e6:.2f} us per hit")
+    print(f"speedup:                     {fresh / reused:.2f}x")
+
+    c = Camera(80, 80, np.pi / 6)
+    c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+    for label, world_pool in (("without pool", None), ("with pool", ComputationsPool())):
+        w.pool = world_pool
+        c.render(w)
+        start = min(timeit.repeat(lambda: c.render(w), number=1, repeat=5))
+        print(f"render {label}: {start:.3f} s")
@@ -0,0 +1,30 @@
+import timeit
+
+import numpy as np
+
+from features.matrix import Translation, Rotation, Scaling
+from features.ray import Ray
+from features.tuple import Point, Tuple, Vector
+
+
+def generic_transform(m, r):
+    """
+    The previous Ray.transform: one Tuple per matrix row and a dot product with numpy scalars.
+    """
+    def multiply(t):
+        return Tuple(Tuple(*(m[0])).dot(t), Tuple(*(m[1])).dot(t), Tuple(*(m[2])).dot(t), Tuple(*(m[3])).dot(t))
+
+    return Ray(multiply(r.origin), multiply(r.direction))
+
+
+if __name__ == "__main__":
+    m = (Translation(1, 2, 3) * Rotation(np.pi / 4, np.pi / 3, 0) * Scaling(2, 2, 2)).inverse()
+    r = Ray(Point(0.5, -1, -5), Vector(0.1, 0.2, 1).normalize())
+    n = 100000
+
+    generic = min(timeit.repeat(lambda: generic_transform(m, r), number=n, repeat=5))
+    affine = min(timeit.repeat(lambda: r.transform(m), number=n, repeat=5))
+
+    print(f"generic Matrix * Tuple: {generic / n * 1e6:.2f} us per ray")
+    print(f"affine Ray.transform:   {affine / n * 1e6:.2f} us per ray")
+    print(f"speedup:                {generic / affine:.1f}x")
@@ -1,3 +1,5 @@
+import numpy as np
+
 from features.intersection import Intersection, Intersections
 from features.tuple import Point
 
@@ -26,6 +28,26 @@ class Bounds:
     def __str__(self):
         return f"Bounds: {{Minimum: {self.minimum}, Maximum: {self.maximum}}}"
 
+    @staticmethod
+    def infinite():
+        return Bounds(Point(-float('inf'), -float('inf'), -float('inf')),
+                      Point(float('inf'), float('inf'), float('inf')))
+
+    def is_empty(self):
+        return self.minimum.x > self.maximum.x
+
+    def is_finite(self):
+        return all(abs(c) < float('inf') for c in (self.minimum.x, self.minimum.y, self.minimum.z, self.maximum.x,
+                                                    self.maximum.y, self.maximum.z))
+
+    def centroid(self):
+        return Point((self.minimum.x + self.maximum.x) / 2, (self.minimum.y + self.maximum.y) / 2,
+                     (self.minimum.z + self.maximum.z) / 2)
+
+    def surface_area(self):
+        dx, dy, dz = (self.maximum.x - self.minimum.x, self.maximum.y - self.minimum.y, self.maximum.z - self.minimum.z)
+        return 2 * (dx * dy + dy * dz + dz * dx)
+
     def contains_point(self, point):
         return self.minimum <= point <= self.maximum
 
@@ -33,6 +55,8 @@ class Bounds:
         return self.contains_point(box.minumim) and self.contains_point(box.maximum)
 
     def transform(self, t):
+        if not self.is_finite():
+            return Bounds() if self.is_empty() else Bounds.infinite()
         points = [self.minimum, Point(self.minimum.x, self.minimum.y, self.maximum.z),
                   Point(self.minimum.x, self.maximum.y, self.minimum.z),
                   Point(self.minimum.x, self.maximum.y, self.maximum.z),
@@ -42,23 +66,83 @@ class Bounds:
         box = Bounds()
 
         for point in points:
-            box.add_point(t * point)
+            box.add_point(t.transform_point(point))
         return box
 
-    def intersect(self, ray):
-        def check_axis(origin, direction, minimum, maximum):
-            t_min_numerator = (minimum - origin)
-            t_max_numerator = (maximum - origin)
-            t_min = t_min_numerator / direction if abs(direction) >= 0.00001 else t_min_numerator * float('inf')
-            t_max = t_max_numerator / direction if abs(direction) >= 0.00001 else t_max_numerator * float('inf')
-            if t_min > t_max:
-                t_min, t_max = t_max, t_min
-            return t_min, t_max
-
-        x_t_min, x_t_max = check_axis(ray.origin.x, ray.direction.x, self.minimum.x, self.maximum.x)
-        y_t_min, y_t_max = check_axis(ray.origin.y, ray.direction.y, self.minimum.y, self.maximum.y)
-        z_t_min, z_t_max = check_axis(ray.origin.z, ray.direction.z, self.minimum.z, self.maximum.z)
-        t_min = max(x_t_min, y_t_min, z_t_min)
-        t_max = min(x_t_max, y_t_max, z_t_max)
-        return Intersections(Intersection(t_min, self),
-                             Intersection(t_max, self)) if t_min <= t_max else Intersections()
+    def hit(self, ray, t_max=None):
+        """
+        Slab test without allocations: (hit, entry, exit), the ray being inside the box for t in [entry, exit]. When
+        t_max is given, a box lying entirely outside (0, t_max) along the ray counts as missed.
+        """
+        origin, (ix, iy, iz) = ray.origin, ray.inv_direction
+        return slab_test(origin.x, origin.y, origin.z, ix, iy, iz, self.minimum, self.maximum, t_max)
+
+    def hit_packet(self, origins, directions, t_max=None):
+        """
+        hit for N rays given as TupleArrays at once; returns arrays (hit, entry, exit) of length N.
+        """
+        return slab_test_packet(origins.data[:, :3], inverse_directions(directions.data[:, :3]),
+                                np.array([self.minimum.x, self.minimum.y, self.minimum.z]),
+                                np.array([self.maximum.x, self.maximum.y, self.maximum.z]), t_max)
+
+    @staticmethod
+    def hit_boxes(ray, minimum, maximum, t_max=None):
+        """
+        hit for one ray against M boxes given as M x 3 arrays of minimum and maximum corners.
+        """
+        return slab_test_packet(np.array([ray.origin.x, ray.origin.y, ray.origin.z]), np.array(ray.inv_direction),
+                                minimum, maximum, t_max)
+
+    def intersect(self, ray, t_max=None):
+        hit, t_min, t_exit = self.hit(ray, t_max)
+        return Intersections(Intersection(t_min, self), Intersection(t_exit, self)) if hit else Intersections()
+
+
+def slab_test(ox, oy, oz, ix, iy, iz, minimum, maximum, t_max=None):
+    """
+    Ray / box slab test for a ray with origin (ox, oy, oz) and reciprocal direction (ix, iy, iz) against the box
+    between two corners with x, y and z attributes; see Bounds.hit.
+    """
+    t_min = (minimum.x - ox) * ix
+    t_exit = (maximum.x - ox) * ix
+    if t_min > t_exit:
+        t_min, t_exit = t_exit, t_min
+    t0 = (minimum.y - oy) * iy
+    t1 = (maximum.y - oy) * iy
+    if t0 > t1:
+        t0, t1 = t1, t0
+    if t0 > t_min:
+        t_min = t0
+    if t1 < t_exit:
+        t_exit = t1
+    t0 = (minimum.z - oz) * iz
+    t1 = (maximum.z - oz) * iz
+    if t0 > t1:
+        t0, t1 = t1, t0
+    if t0 > t_min:
+        t_min = t0
+    if t1 < t_exit:
+        t_exit = t1
+    hit = t_min <= t_exit and (t_max is None or (t_min < t_max and t_exit > 0))
+    return hit, t_min, t_exit
+
+
+def inverse_directions(directions):
+    with np.errstate(divide='ignore'):
+        return np.where(np.abs(directions) >= 0.00001, 1 / directions, np.inf)
+
+
+def slab_test_packet(origins, inv_directions, minimum, maximum, t_max=None):
+    """
+    slab_test broadcast over arrays whose last axis is (x, y, z): N rays against one box, one ray against M boxes or
+    N rays against N boxes.
+    """
+    with np.errstate(invalid='ignore'):
+        t0 = (minimum - origins) * inv_directions
+        t1 = (maximum - origins) * inv_directions
+        t_min = np.fmax.reduce(np.minimum(t0, t1), axis=-1, initial=-np.inf)
+        t_exit = np.fmin.reduce(np.maximum(t0, t1), axis=-1, initial=np.inf)
+    hit = t_min <= t_exit
+    if t_max is not None:
+        hit &= (t_min < t_max) & (t_exit > 0)
+    return hit, t_min, t_exit
@@ -0,0 +1,317 @@
+import numpy as np
+
+from features.bounds import Bounds, slab_test, slab_test_packet, inverse_directions
+from features.ray import Ray
+from features.tuple import Point
+
+
+class BVHNode:
+    """
+    Node of a bounding volume hierarchy. Leaves hold a list of shapes, inner nodes a left and right child; box bounds
+    everything below the node in the space of the group that owns the hierarchy.
+    """
+    __slots__ = ('box', 'left', 'right', 'shapes')
+
+    def __init__(self, box, left=None, right=None, shapes=None):
+        self.box = box
+        self.left = left
+        self.right = right
+        self.shapes = shapes
+
+
+class BVH:
+    """
+    Bounding volume hierarchy over the children of a Group, split with the surface area heuristic until no leaf holds
+    more than leaf_size shapes. Children without finite bounds (planes, infinite cylinders, ...) are kept aside in
+    `unbounded` and tested against every ray. Traversal visits the nearer child box first.
+    """
+    def __init__(self, shapes, leaf_size=4):
+        self.leaf_size = max(1, leaf_size)
+        self.unbounded = []
+        items = []
+        for shape in shapes:
+            box = child_bounds(shape)
+            if box is None:
+                self.unbounded.append(shape)
+            else:
+                items.append((shape, box, box.centroid()))
+        self.root = build(items, self.leaf_size) if items else None
+
+    def visit(self, ray, callback):
+        """
+        Calls callback with every shape whose leaf box the ray passes through, for queries that need all intersections.
+        """
+        for shape in self.unbounded:
+            callback(shape)
+        if self.root is not None and self.root.box.hit(ray)[0]:
+            self._visit(self.root, ray, callback)
+
+    def _visit(self, node, ray, callback):
+        if node.shapes is not None:
+            for shape in node.shapes:
+                callback(shape)
+            return
+        for _, child in front_to_back(node, ray, None):
+            self._visit(child, ray, callback)
+
+    def any_hit(self, ray, t_max):
+        if any(shape.any_hit(ray, t_max) for shape in self.unbounded):
+            return True
+        return self.root is not None and self.root.box.hit(ray, t_max)[0] and self._any_hit(self.root, ray, t_max)
+
+    def _any_hit(self, node, ray, t_max):
+        if node.shapes is not None:
+            return any(shape.any_hit(ray, t_max) for shape in node.shapes)
+        return any(self._any_hit(child, ray, t_max) for _, child in front_to_back(node, ray, t_max))
+
+    def closest_hit(self, ray, t_max):
+        hit = None
+        for shape in self.unbounded:
+            shape_hit = shape.closest_hit(ray, t_max)
+            if shape_hit:
+                hit, t_max = shape_hit, shape_hit.t
+        if self.root is not None and self.root.box.hit(ray, t_max)[0]:
+            hit = self._closest_hit(self.root, ray, t_max) or hit
+        return hit
+
+    def _closest_hit(self, node, ray, t_max):
+        hit = None
+        if node.shapes is not None:
+            for shape in node.shapes:
+                shape_hit = shape.closest_hit(ray, t_max)
+                if shape_hit:
+                    hit, t_max = shape_hit, shape_hit.t
+            return hit
+
+        for entry, child in front_to_back(node, ray, t_max):
+            if entry >= t_max:
+                break
+            child_hit = self._closest_hit(child, ray, t_max)
+            if child_hit:
+                hit, t_max = child_hit, child_hit.t
+        return hit
+
+    def depth(self, node=None):
+        node = self.root if node is None else node
+        if node is None or node.shapes is not None:
+            return 0
+        return 1 + max(self.depth(node.left), self.depth(node.right))
+
+    def flatten(self):
+        return FlatBVH(self)
+
+
+class FlatBVH:
+    """
+    A BVH compiled into flat arrays in depth-first order and traversed with an explicit stack. Node i's box is
+    minimum[i]..maximum[i]; an inner node's children are nodes i + 1 and right[i], a leaf's shapes are
+    shapes[start[i]:start[i] + count[i]] and count is 0 for inner nodes. Answers the same queries as BVH, plus
+    closest_hit_packet for a whole packet of rays at once.
+    """
+    def __init__(self, bvh):
+        self.unbounded = list(bvh.unbounded)
+        self.shapes = []
+        boxes, right, start, count = [], [], [], []
+
+        def add(node):
+            index = len(boxes)
+            boxes.append(node.box)
+            right.append(-1)
+            start.append(len(self.shapes))
+            count.append(0)
+            if node.shapes is not None:
+                count[index] = len(node.shapes)
+                self.shapes.extend(node.shapes)
+            else:
+                add(node.left)
+                right[index] = add(node.right)
+            return index
+
+        if bvh.root is not None:
+            add(bvh.root)
+        self.minimum = np.array([(b.minimum.x, b.minimum.y, b.minimum.z) for b in boxes], dtype=float).reshape(-1, 3)
+        self.maximum = np.array([(b.maximum.x, b.maximum.y, b.maximum.z) for b in boxes], dtype=float).reshape(-1, 3)
+        self.right = np.array(right, dtype=np.int64)
+        self.start = np.array(start, dtype=np.int64)
+        self.count = np.array(count, dtype=np.int64)
+        self._nodes = list(zip([Point(*m) for m in self.minimum.tolist()], [Point(*m) for m in self.maximum.tolist()],
+                               right, start, count))
+
+    def __len__(self):
+        return len(self._nodes)
+
+    def entry(self, index, ray, t_max=None):
+        """
+        Where the ray enters node index's box, or None if it misses it; same test as Bounds.hit(ray, t_max).
+        """
+        minimum, maximum = self._nodes[index][:2]
+        origin, (ix, iy, iz) = ray.origin, ray.inv_direction
+        hit, t_min, _ = slab_test(origin.x, origin.y, origin.z, ix, iy, iz, minimum, maximum, t_max)
+        return t_min if hit else None
+
+    def visit(self, ray, callback):
+        for shape in self.unbounded:
+            callback(shape)
+        stack = [0] if self._nodes else []
+        while stack:
+            index = stack.pop()
+            if self.entry(index, ray) is None:
+                continue
+            _, _, right, start, count = self._nodes[index]
+            if count:
+                for shape in self.shapes[start:start + count]:
+                    callback(shape)
+            else:
+                stack.append(right)
+                stack.append(index + 1)
+
+    def any_hit(self, ray, t_max):
+        if any(shape.any_hit(ray, t_max) for shape in self.unbounded):
+            return True
+        stack = [0] if self._nodes else []
+        while stack:
+            index = stack.pop()
+            if self.entry(index, ray, t_max) is None:
+                continue
+            _, _, right, start, count = self._nodes[index]
+            if count:
+                if any(shape.any_hit(ray, t_max) for shape in self.shapes[start:start + count]):
+                    return True
+            else:
+                stack.append(right)
+                stack.append(index + 1)
+        return False
+
+    def closest_hit(self, ray, t_max):
+        hit = None
+        for shape in self.unbounded:
+            shape_hit = shape.closest_hit(ray, t_max)
+            if shape_hit:
+                hit, t_max = shape_hit, shape_hit.t
+
+        root_entry = self.entry(0, ray, t_max) if self._nodes else None
+        stack = [] if root_entry is None else [(root_entry, 0)]
+        while stack:
+            entry, index = stack.pop()
+            if entry >= t_max:
+                continue
+            _, _, right, start, count = self._nodes[index]
+            if count:
+                for shape in self.shapes[start:start + count]:
+                    shape_hit = shape.closest_hit(ray, t_max)
+                    if shape_hit:
+                        hit, t_max = shape_hit, shape_hit.t
+                continue
+
+            near, far = (self.entry(index + 1, ray, t_max), index + 1), (self.entry(right, ray, t_max), right)
+            if near[0] is not None and far[0] is not None and far[0] < near[0]:
+                near, far = far, near
+            for child in (far, near):
+                if child[0] is not None:
+                    stack.append(child)
+        return hit
+
+    def boxes_hit_packet(self, index, origins, inv_directions, t_max):
+        """
+        Mask of the rays, given as N x 3 arrays of origins and reciprocal directions, that enter node index's box before
+        t_max.
+        """
+        return slab_test_packet(origins, inv_directions, self.minimum[index], self.maximum[index], t_max)[0]
+
+    def closest_hit_packet(self, origins, directions, t_max=float('inf')):
+        """
+        Closest hits in (0, t_max) for a packet of rays given as TupleArrays. Each node box is tested against all the
+        rays still active below it at once, and shapes with packet kernels (see Shape.intersect_packet) intersect all
+        the rays reaching their leaf at once; other shapes fall back to closest_hit ray by ray. Returns an array of t
+        values, infinity where nothing was hit, and the list of objects hit, None where nothing was.
+        """
+        best_t = np.full(len(origins), float(t_max))
+        best_obj = [None] * len(origins)
+        xyz_origins, inv_directions = origins.data[:, :3], inverse_directions(directions.data[:, :3])
+
+        def intersect(shapes, rays):
+            for shape in shapes:
+                result = shape.intersect_packet(origins[rays], directions[rays])
+                if result is None:
+                    for i in rays.tolist():
+                        shape_hit = shape.closest_hit(Ray(origins[i], directions[i]), best_t[i])
+                        if shape_hit:
+                            best_t[i], best_obj[i] = shape_hit.t, shape_hit.obj
+                    continue
+                t, hit = result
+                t = np.where(hit & (t > 0), t, np.inf).min(axis=1)
+                closer = t < best_t[rays]
+                best_t[rays[closer]] = t[closer]
+                for i in rays[closer].tolist():
+                    best_obj[i] = shape
+
+        intersect(self.unbounded, np.arange(len(origins)))
+        stack = [(0, np.arange(len(origins)))] if self._nodes else []
+        while stack:
+            index, rays = stack.pop()
+            rays = rays[self.boxes_hit_packet(index, xyz_origins[rays], inv_directions[rays], best_t[rays])]
+            if not len(rays):
+                continue
+            _, _, right, start, count = self._nodes[index]
+            if count:
+                intersect(self.shapes[start:start + count], rays)
+            else:
+                stack.append((right, rays))
+                stack.append((index + 1, rays))
+
+        best_t[[obj is None for obj in best_obj]] = np.inf
+        return best_t, best_obj
+
+
+def child_bounds(shape):
+    """
+    Box of shape in its parent's space, or None when it has no finite bounds.
+    """
+    shape.bounds()
+    if shape.box is None or not shape.box.is_finite():
+        return None
+    box = shape.box.transform(shape.transform)
+    return box if box.is_finite() else None
+
+
+def front_to_back(node, ray, t_max):
+    entries = []
+    for child in (node.left, node.right):
+        hit, entry, _ = child.box.hit(ray, t_max)
+        if hit:
+            entries.append((entry, child))
+    if len(entries) == 2 and entries[1][0] < entries[0][0]:
+        entries.reverse()
+    return entries
+
+
+def build(items, leaf_size):
+    """
+    Builds the subtree over (shape, box, centroid) items. Each split sorts the items along every axis by centroid and
+    picks the partition with the lowest surface area heuristic cost, left area * left count + right area * right count.
+    """
+    box = Bounds()
+    for _, child_box, _ in items:
+        box += child_box
+    if len(items) <= leaf_size:
+        return BVHNode(box, shapes=[shape for shape, _, _ in items])
+
+    best_cost, best_items, best_split = None, None, None
+    for axis in ('x', 'y', 'z'):
+        ordered = sorted(items, key=lambda item: getattr(item[2], axis))
+        left_areas = sweep_areas(ordered)
+        right_areas = sweep_areas(ordered[::-1])[::-1]
+        for split in range(1, len(ordered)):
+            cost = split * left_areas[split - 1] + (len(ordered) - split) * right_areas[split]
+            if best_cost is None or cost < best_cost:
+                best_cost, best_items, best_split = cost, ordered, split
+    return BVHNode(box, build(best_items[:best_split], leaf_size), build(best_items[best_split:], leaf_size))
+
+
+def sweep_areas(items):
+    box = Bounds()
+    areas = []
+    for _, child_box, _ in items:
+        box += child_box
+        areas.append(box.surface_area())
+    return areas
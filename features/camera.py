@@ -1,9 +1,12 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
 
 from features.canvas import Canvas
 from features.matrix import Matrix
 from features.ray import Ray
-from features.tuple import Point
+from features.tuple import Color, Point, TupleArray
 
 
 class Camera:
@@ -25,18 +28,214 @@ class Camera:
 
         self.pixel_size = (self.half_width * 2) / self.h_size
 
-    def ray_for_pixel(self, x, y):
-        x_offset = (x + 0.5) * self.pixel_size
-        y_offset = (y + 0.5) * self.pixel_size
+    def ray_for_pixel(self, x, y, dx=0.5, dy=0.5):
+        x_offset = (x + dx) * self.pixel_size
+        y_offset = (y + dy) * self.pixel_size
 
-        pixel = self.transform.inverse() * Point(self.half_width - x_offset, self.half_height - y_offset, -1)
-        origin = self.transform.inverse() * Point(0, 0, 0)
+        inverse = self.transform.inverse()
+        pixel = inverse.transform_point(Point(self.half_width - x_offset, self.half_height - y_offset, -1))
+        origin = inverse.transform_point(Point(0, 0, 0))
         return Ray(origin, (pixel - origin).normalize())
 
-    def render(self, world):
-        image = Canvas(self.h_size, self.v_size)
+    def rays_for_tile(self, x=0, y=0, width=None, height=None):
+        """
+        Primary rays for the width x height block of pixels starting at (x, y), the whole image by default, as a pair of
+        (origins, directions) TupleArrays in row-major pixel order. Matches ray_for_pixel bit for bit.
+        """
+        width = self.h_size - x if width is None else width
+        height = self.v_size - y if height is None else height
+        xs, ys = np.meshgrid(np.arange(x, x + width), np.arange(y, y + height))
+        world_x = self.half_width - (xs.ravel() + 0.5) * self.pixel_size
+        world_y = self.half_height - (ys.ravel() + 0.5) * self.pixel_size
+
+        inverse = self.transform.inverse()
+        origin = inverse.transform_point(Point(0, 0, 0))
+        pixels = np.empty((len(world_x), 4))
+        for row, (a, b, c, d) in enumerate(inverse.rows()):
+            pixels[:, row] = a * world_x + b * world_y + c * -1 + d
+        offsets = pixels - np.array([origin.x, origin.y, origin.z, origin.w])
+        length = np.sqrt(offsets[:, 0] * offsets[:, 0] + offsets[:, 1] * offsets[:, 1] + offsets[:, 2] * offsets[:, 2] +
+                         offsets[:, 3] * offsets[:, 3])
+        origins = np.tile([origin.x, origin.y, origin.z, origin.w], (len(world_x), 1))
+        return TupleArray(origins), TupleArray(offsets / length[:, None])
+
+    def tiles(self, tile_size, region=None):
+        """
+        Splits the image, or the (x, y, width, height) region of it, into tiles of at most tile_size x tile_size pixels,
+        in row-major order.
+        """
+        x0, y0, width, height = (0, 0, self.h_size, self.v_size) if region is None else region
+        return [(x, y, min(tile_size, x0 + width - x), min(tile_size, y0 + height - y))
+                for y in range(y0, y0 + height, tile_size) for x in range(x0, x0 + width, tile_size)]
+
+    def render_tile(self, world, tile):
+        x, y, width, height = tile
+        return [[world.color_at(self.ray_for_pixel(i, j)) for i in range(x, x + width)] for j in range(y, y + height)]
+
+    def supersample(self, world, x, y, samples, threshold=None, primary=None):
+        """
+        Colour of pixel (x, y) averaged over its centre ray, traced unless its colour is passed as primary, and up to
+        `samples` sub-pixel rays at Halton offsets. The sub-pixel rays are added four at a time; with a threshold, it
+        stops as soon as a round changes the running colour by less than threshold in every channel.
+        """
+        primary = world.color_at(self.ray_for_pixel(x, y)) if primary is None else primary
+        total = Color(primary.red, primary.green, primary.blue)
+        color = primary
+        for start in range(1, samples + 1, 4):
+            end = min(start + 4, samples + 1)
+            for i in range(start, end):
+                total.iadd(world.color_at(self.ray_for_pixel(x, y, _halton(i, 2), _halton(i, 3))))
+            previous, color = color, total / end
+            if threshold is not None and abs(color.red - previous.red) < threshold and \
+                    abs(color.green - previous.green) < threshold and abs(color.blue - previous.blue) < threshold:
+                break
+        return color
+
+    @staticmethod
+    def edge_pixels(image, threshold, region=None):
+        """
+        Pixels of the image, or of the (x, y, width, height) region of it, whose colour differs from a horizontal or
+        vertical neighbour inside the region by more than threshold in any channel.
+        """
+        def differs(a, b):
+            return abs(a.x - b.x) > threshold or abs(a.y - b.y) > threshold or abs(a.z - b.z) > threshold
+
+        x0, y0, width, height = (0, 0, image.width, image.height) if region is None else region
+        grid = image.grid
+        edges = set()
+        for y in range(y0, y0 + height):
+            for x in range(x0, x0 + width):
+                if x + 1 < x0 + width and differs(grid[y][x], grid[y][x + 1]):
+                    edges.update(((x, y), (x + 1, y)))
+                if y + 1 < y0 + height and differs(grid[y][x], grid[y + 1][x]):
+                    edges.update(((x, y), (x, y + 1)))
+        return sorted(edges, key=lambda p: (p[1], p[0]))
 
-        for y in range(self.v_size):
-            for x in range(self.h_size):
-                image.write_pixel(x, y, world.color_at(self.ray_for_pixel(x, y)))
+    def render(self, world, workers=1, tile_size=32, aa_threshold=None, aa_samples=16, region=None, canvas=None):
+        """
+        Renders the world. With workers other than 1 the image is split into tiles that are rendered by a pool of that
+        many processes (one per CPU when None); the result is identical to the serial render.
+
+        With aa_threshold set, pixels on a colour edge (see edge_pixels) then get up to aa_samples extra sub-pixel rays
+        each (see supersample), while the rest of the image keeps its single ray per pixel.
+
+        region restricts tracing to an (x, y, width, height) pixel rectangle, or a list of them, using the same rays as
+        the full frame. A single rectangle gives a canvas cropped to it, a list gives a full-size canvas with only those
+        rectangles drawn; when a canvas is passed the pixels are written into it at their frame positions instead.
+        An empty list of rectangles, rectangles that are empty or not fully inside the frame, and a canvas of another
+        size than the frame raise a ValueError.
+        """
+        if region is not None and not len(region):
+            raise ValueError("region must be a rectangle or a non-empty list of rectangles")
+        if canvas is not None and (canvas.width, canvas.height) != (self.h_size, self.v_size):
+            raise ValueError(f"Canvas is {canvas.width}x{canvas.height} but the frame is {self.h_size}x{self.v_size}")
+        cropped = region is not None and not isinstance(region[0], (tuple, list))
+        if region is None:
+            regions = [(0, 0, self.h_size, self.v_size)]
+        else:
+            regions = [region] if cropped else list(region)
+        for x, y, width, height in regions:
+            if width <= 0 or height <= 0 or x < 0 or y < 0 or x + width > self.h_size or y + height > self.v_size:
+                raise ValueError(f"Region {(x, y, width, height)} is not inside the {self.h_size}x{self.v_size} frame")
+
+        if canvas is not None:
+            image, x0, y0 = canvas, 0, 0
+        elif cropped:
+            image, (x0, y0) = Canvas(region[2], region[3]), region[:2]
+        else:
+            image, x0, y0 = Canvas(self.h_size, self.v_size), 0, 0
+
+        if workers == 1:
+            self._render_regions(image, x0, y0, regions, tile_size, aa_threshold,
+                                 lambda tiles: (self.render_tile(world, tile) for tile in tiles),
+                                 lambda pixels, primaries: (self.supersample(world, *pixel, aa_samples, aa_threshold,
+                                                                             primary)
+                                                            for pixel, primary in zip(pixels, primaries)))
+            return image
+
+        with ProcessPoolExecutor(workers or os.cpu_count(), initializer=_init_worker, initargs=(self, world)) as pool:
+            self._render_regions(image, x0, y0, regions, tile_size, aa_threshold,
+                                 lambda tiles: pool.map(_render_tile, tiles),
+                                 lambda pixels, primaries: pool.map(_supersample, pixels, primaries,
+                                                                    [aa_samples] * len(pixels),
+                                                                    [aa_threshold] * len(pixels), chunksize=tile_size))
         return image
+
+    def _render_regions(self, image, x0, y0, regions, tile_size, aa_threshold, trace_tiles, trace_pixels):
+        """
+        Traces the regions tile by tile into image, whose pixel (0, 0) is frame pixel (x0, y0), then supersamples the
+        edge pixels of each region.
+        """
+        tiles = [tile for region in regions for tile in self.tiles(tile_size, region)]
+        for (x, y, _, _), colors in zip(tiles, trace_tiles(tiles)):
+            for j, row in enumerate(colors):
+                image.grid[y - y0 + j][x - x0:x - x0 + len(row)] = row
+
+        if aa_threshold is None:
+            return
+        for x, y, width, height in regions:
+            edges = self.edge_pixels(image, aa_threshold, (x - x0, y - y0, width, height))
+            pixels = [(i + x0, j + y0) for i, j in edges]
+            primaries = [image.pixel_at(i - x0, j - y0) for i, j in pixels]
+            for (i, j), color in zip(pixels, trace_pixels(pixels, primaries)):
+                image.write_pixel(i - x0, j - y0, color)
+
+    def render_progressive(self, world, step=8):
+        """
+        Generator for quick previews: traces one pixel per step x step block and fills the block's untraced pixels with
+        it, then halves the step and traces only the pixels not traced yet, until every pixel is traced. Yields the same
+        Canvas after each pass; the last one is identical to render(world). step must be a positive integer.
+        """
+        if not isinstance(step, int) or step < 1:
+            raise ValueError(f"step must be a positive integer, not {step!r}")
+        return self._progressive_passes(world, step)
+
+    def _progressive_passes(self, world, step):
+        image = Canvas(self.h_size, self.v_size)
+        traced = [[False] * self.h_size for _ in range(self.v_size)]
+
+        while True:
+            for y in range(0, self.v_size, step):
+                for x in range(0, self.h_size, step):
+                    if traced[y][x]:
+                        continue
+                    traced[y][x] = True
+                    color = world.color_at(self.ray_for_pixel(x, y))
+                    for j in range(y, min(y + step, self.v_size)):
+                        for i in range(x, min(x + step, self.h_size)):
+                            if not traced[j][i] or (i, j) == (x, y):
+                                image.grid[j][i] = color
+            yield image
+            if step == 1:
+                return
+            step //= 2
+
+
+_worker_camera = None
+_worker_world = None
+
+
+def _init_worker(camera, world):
+    global _worker_camera, _worker_world
+    _worker_camera = camera
+    _worker_world = world
+
+
+def _render_tile(tile):
+    return _worker_camera.render_tile(_worker_world, tile)
+
+
+def _supersample(pixel, primary, samples, threshold):
+    return _worker_camera.supersample(_worker_world, *pixel, samples, threshold, primary)
+
+
+def _halton(index, base):
+    """
+    index-th element of the Halton sequence in the given base, a well spread sub-pixel offset in (0, 1).
+    """
+    result, fraction = 0, 1
+    while index:
+        fraction /= base
+        index, digit = divmod(index, base)
+        result += digit * fraction
+    return result
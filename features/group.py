@@ -1,6 +1,7 @@
 import numpy as np
 
 from features.bounds import Bounds
+from features.bvh import BVH
 from features.intersection import Intersections
 from features.matrix import Translation, Scaling, Rotation
 from features.shape import Shape, Sphere, Cylinder
@@ -8,41 +9,129 @@ from features.shape import Shape, Sphere, Cylinder
 
 class Group(Shape):
     def __init__(self, transform=None, material=None, parent=None):
-        super().__init__(transform, material, parent)
         self.shapes = []
+        self.bvh = None
+        self.leaf_size = None
+        self._local_box = Bounds()
+        super().__init__(transform, material, parent)
 
     def add_child(self, s):
         s.parent = self
         s.material = self.material
         self.shapes.append(s)
-        self.bounds()
+        self.bvh = None
+        Shape.revision += 1
+        if self._local_box is not None:
+            self._local_box = self.include(self._local_box, s)
+        self.box = self.local_bounds()
+        if self.parent:
+            self.parent.invalidate_bounds()
+
+    def divide(self, leaf_size=4):
+        """
+        Builds a bounding volume hierarchy over the children, and over those of nested groups, so rays are tested
+        against O(log n) of them, and compiles it into a FlatBVH. Adding children or changing their transforms, here or
+        in a nested group, discards it, and it is rebuilt by the next query (see hierarchy).
+        """
+        for shape in self.shapes:
+            if isinstance(shape, Group):
+                shape.divide(leaf_size)
+        self.leaf_size = leaf_size
+        self.bvh = BVH(self.shapes, leaf_size).flatten()
+
+    def hierarchy(self):
+        """
+        The FlatBVH over the children, rebuilt first if it was discarded since divide, or None if the group was never
+        divided.
+        """
+        if self.bvh is None and self.leaf_size is not None:
+            self.bvh = BVH(self.shapes, self.leaf_size).flatten()
+        return self.bvh
 
     def local_intersect(self, ray):
         xs = Intersections()
-        if not self.box:
-            self.bounds()
-        if self.box.intersect(ray):
+        bvh = self.hierarchy()
+        if bvh is not None:
+            bvh.visit(ray, lambda shape: xs.extend(shape.intersect(ray)))
+            xs.sort()
+            return xs
+        if self.local_bounds().hit(ray)[0]:
             for shape in self.shapes:
                 xs.extend(shape.intersect(ray))
             xs.sort()
         return xs
 
+    def local_intersect_into(self, ray, record):
+        bvh = self.hierarchy()
+        if bvh is not None:
+            return bvh.visit(ray, lambda shape: shape.intersect_into(ray, record))
+        if self.local_bounds().hit(ray)[0]:
+            for shape in self.shapes:
+                shape.intersect_into(ray, record)
+
+    def local_any_hit(self, ray, t_max):
+        bvh = self.hierarchy()
+        if bvh is not None:
+            return bvh.any_hit(ray, t_max)
+        return self.local_bounds().hit(ray)[0] and any(shape.any_hit(ray, t_max) for shape in self.shapes)
+
+    def local_closest_hit(self, ray, t_max):
+        bvh = self.hierarchy()
+        if bvh is not None:
+            return bvh.closest_hit(ray, t_max)
+        hit = None
+        if self.local_bounds().hit(ray, t_max)[0]:
+            for shape in self.shapes:
+                child_hit = shape.closest_hit(ray, t_max)
+                if child_hit:
+                    hit, t_max = child_hit, child_hit.t
+        return hit
+
     def set_transform(self, t):
         super().set_transform(t)
-        self.bounds()
-        self.box = self.box.transform(t)
+        self.box = self.local_bounds().transform(t)
 
     def set_material(self, m=None):
         for shape in self.shapes:
             shape.material = self.material if m is None else m
 
     def bounds(self):
-        box = Bounds()
-        for shape in self.shapes:
-            if hasattr(shape, 'minimum') or hasattr(shape, 'origin') or isinstance(shape, Group):
-                shape.bounds()
-                box += shape.box.transform(shape.transform)
-        self.box = box
+        self.box = self.local_bounds()
+
+    def local_bounds(self):
+        """
+        Box around the children in the group's own space. add_child extends it in place; a child's transform changing
+        or a nested group gaining a child only marks it, and every group above, dirty, and it is recomputed here when
+        next needed.
+        """
+        if self._local_box is None:
+            box = Bounds()
+            for shape in self.shapes:
+                box = self.include(box, shape)
+            self._local_box = box
+        return self._local_box
+
+    def invalidate_bounds(self):
+        """
+        Marks the bounds and the BVH of this group and of every group above it out of date.
+        """
+        group = self
+        while group is not None:
+            group._local_box = None
+            group.bvh = None
+            group = group.parent
+
+    @staticmethod
+    def include(box, shape):
+        """
+        box extended by shape's box in its parent's space; infinite when shape has no finite bounds.
+        """
+        shape.bounds()
+        if shape.box is None or not (shape.box.is_finite() or shape.box.is_empty()):
+            return Bounds.infinite()
+        if not shape.box.is_empty():
+            box += shape.box.transform(shape.transform)
+        return box
 
 
 class Hexagon(Group):
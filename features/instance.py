@@ -0,0 +1,108 @@
+from features.intersection import Intersection, Intersections
+from features.matrix import Matrix
+from features.shape import Shape
+
+
+class Instance(Shape):
+    """
+    A placement of shared geometry (any shape: a primitive, a Group, a Mesh) with its own transform and, optionally,
+    its own material. The geometry is never modified, so any number of instances can share one copy of it together
+    with its acceleration structure (Group.divide's BVH, a Mesh's face BVH). The geometry must not itself be part of a
+    group; its own transform applies inside the instance's.
+
+    Hits are reported on InstanceProxy objects that wrap the geometry's shape with this instance. A material passed
+    here, or given by a group the instance is added to, replaces the geometry's materials; without one every shape
+    keeps its own.
+    """
+    def __init__(self, geometry, transform=None, material=None, parent=None):
+        if geometry.parent is not None:
+            raise Exception
+        self.geometry = geometry
+        self.solids = {}
+        self.transforms = {}
+        super().__init__(transform, None, parent)
+        self._material = material
+
+    def __getstate__(self):
+        return dict(self.__dict__, solids={}, transforms={})
+
+    @property
+    def material(self):
+        return self.geometry.material if self._material is None else self._material
+
+    @material.setter
+    def material(self, m):
+        self._material = m
+
+    def solid_proxy(self, solid):
+        """
+        The proxy standing for solid in refraction; one per solid and instance, so that it keeps its identity across the
+        intersections of a ray.
+        """
+        proxy = self.solids.get(id(solid))
+        if proxy is None:
+            proxy = self.solids[id(solid)] = InstanceProxy(solid, self)
+        return proxy
+
+    def proxy_transform(self, shape):
+        """
+        This instance's transform times shape's, for the proxies of shape. It is cached per shape transform, so its
+        inverse is computed once, and reused while both matrices are the same objects and no matrix was edited in place.
+        """
+        inner = shape.transform
+        entry = self.transforms.get(id(inner))
+        if entry is None or entry[0] is not self.transform or entry[1] is not inner or entry[2] != Matrix.revision:
+            entry = self.transforms[id(inner)] = (self.transform, inner, Matrix.revision, self.transform * inner)
+        return entry[3]
+
+    def local_intersect(self, ray):
+        return Intersections(*(Intersection(i.t, InstanceProxy(i.obj, self)) for i in self.geometry.intersect(ray)))
+
+    def local_any_hit(self, ray, t_max):
+        return self.geometry.any_hit(ray, t_max)
+
+    def local_closest_hit(self, ray, t_max):
+        hit = self.geometry.closest_hit(ray, t_max)
+        return None if hit is None else Intersection(hit.t, InstanceProxy(hit.obj, self))
+
+    def bounds(self):
+        self.geometry.bounds()
+        box = self.geometry.box
+        self.box = None if box is None else box.transform(self.geometry.transform)
+
+
+class InstanceProxy(Shape):
+    """
+    A shape of an Instance's geometry as seen through that instance: points and normals pass through the instance's
+    transform, and its parents', on their way to and from the shape.
+    """
+    def __init__(self, shape, instance):
+        self.shape = shape
+        self.instance = instance
+        self.box = None
+
+    @property
+    def transform(self):
+        return self.instance.proxy_transform(self.shape)
+
+    @property
+    def parent(self):
+        return self.instance.parent
+
+    @property
+    def material(self):
+        material = self.instance._material
+        return self.shape.material if material is None else material
+
+    @property
+    def solid(self):
+        return self.instance.solid_proxy(self.shape.solid)
+
+    def normal_at(self, point):
+        return self.instance.normal_to_world(self.shape.normal_at(self.instance.world_to_object(point)))
+
+    def world_to_object(self, point):
+        return self.shape.world_to_object(self.instance.world_to_object(point))
+
+    def normal_to_world(self, normal):
+        return self.instance.normal_to_world(self.shape.normal_to_world(normal))
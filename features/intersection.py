@@ -1,51 +1,88 @@
+from array import array
+
 import numpy as np
 
+from features.tuple import Point, Vector
+
+ZERO = Vector(0, 0, 0)
+
 
 class Intersection:
+    __slots__ = ('t', 'obj')
+
     def __init__(self, t, obj):
         self.t = t
         self.obj = obj
 
     def __eq__(self, other):
-        return isinstance(other, Intersection) and self.t == other.t and self.obj == self.obj
+        return isinstance(other, Intersection) and self.t == other.t and self.obj == other.obj
 
     def __lt__(self, other):
-        return isinstance(other, Intersection) and self.t < other.t and self.obj == self.obj
-
-    def prepare_computations(self, r, xs=None):
-        comps = Computations(self.t, self.obj)
-        comps.point = r.position(comps.t)
-        comps.eye_v = -r.direction
+        return self.t < other.t
+
+    def prepare_computations(self, r, xs=None, pool=None):
+        """
+        Computations for shading this hit. With a pool, the Computations and its point and vectors are reused from an
+        earlier hit and overwritten in place; only the normal, which comes from the shape, is newly allocated.
+        """
+        if pool is None:
+            comps = Computations(self.t, self.obj)
+            comps.point = r.origin.add_scaled(r.direction, comps.t)
+            comps.eye_v = -r.direction
+        else:
+            comps = pool.acquire(self.t, self.obj)
+            comps.point.set_add_scaled(r.origin, r.direction, comps.t)
+            comps.eye_v.set_add_scaled(ZERO, r.direction, -1)
         comps.normal_v = comps.obj.normal_at(comps.point)
         comps.inside = False
 
         if comps.normal_v.dot(comps.eye_v) < 0:
             comps.inside = True
-            comps.normal_v = -comps.normal_v
+            comps.normal_v.imul(-1)
 
         comps.n1 = comps.n2 = 1
 
-        if xs:
-            containers = []
-            for i in xs:
-                if i == self:
-                    comps.n1 = 1 if not (len(containers)) else containers[len(containers) - 1].material.refractive_index
-
-                if i.obj in containers:
-                    containers.remove(i.obj)
-                else:
-                    containers.append(i.obj)
-
-                if i == self:
-                    comps.n2 = 1 if not (len(containers)) else containers[len(containers) - 1].material.refractive_index
-
-        comps.over_point = comps.point + comps.normal_v * 0.00001
-        comps.under_point = comps.point - comps.normal_v * 0.00001
-        comps.reflect_v = r.direction.reflect(comps.normal_v)
+        material = comps.obj.material
+        if xs and (material.transparency or material.reflective):
+            comps.n1, comps.n2 = self.refractive_indices(xs)
+
+        if pool is None:
+            comps.over_point = comps.point.add_scaled(comps.normal_v, 0.00001)
+            comps.under_point = comps.point.add_scaled(comps.normal_v, -0.00001)
+            comps.reflect_v = r.direction.reflect(comps.normal_v)
+        else:
+            comps.over_point.set_add_scaled(comps.point, comps.normal_v, 0.00001)
+            comps.under_point.set_add_scaled(comps.point, comps.normal_v, -0.00001)
+            comps.reflect_v.set_add_scaled(r.direction, comps.normal_v, -2 * r.direction.dot(comps.normal_v))
         return comps
 
+    def refractive_indices(self, xs):
+        """
+        (n1, n2) on either side of this intersection, given every intersection along the ray sorted by t. The objects
+        the ray is inside are kept in an insertion-ordered dict keyed by identity, so the walk is linear in len(xs).
+        """
+        n1 = n2 = 1
+        containers = {}
+        for i in xs:
+            hit = i is self or (i.t == self.t and i.obj is self.obj)
+            if hit and containers:
+                n1 = next(reversed(containers.values())).material.refractive_index
+
+            solid = i.obj.solid
+            if containers.pop(id(solid), None) is None:
+                containers[id(solid)] = solid
+
+            if hit:
+                if containers:
+                    n2 = next(reversed(containers.values())).material.refractive_index
+                break
+        return n1, n2
+
 
 class Computations:
+    __slots__ = ('t', 'obj', 'point', 'eye_v', 'normal_v', 'inside', 'over_point', 'under_point', 'reflect_v', 'n1',
+                 'n2')
+
     def __init__(self, t, obj):
         self.t = t
         self.obj = obj
@@ -74,13 +111,48 @@ class Computations:
         return r0 + (1 - r0) * (1 - cos) ** 5
 
 
+class ComputationsPool:
+    """
+    Free list of Computations objects, so shading a hit reuses one released by an earlier hit, along with its point,
+    eye, over/under point and reflection vectors, instead of allocating new ones. A released Computations must not be
+    referenced any more, which World.color_at guarantees by releasing it once shade_hit has returned. Every World has
+    one as World.pool; every render worker unpickles its own copy of the world, so the pool is never shared between
+    processes.
+    """
+    __slots__ = ('free',)
+
+    def __init__(self):
+        self.free = []
+
+    def acquire(self, t, obj):
+        if not self.free:
+            comps = Computations(t, obj)
+            comps.point, comps.over_point, comps.under_point = Point(0, 0, 0), Point(0, 0, 0), Point(0, 0, 0)
+            comps.eye_v, comps.reflect_v = Vector(0, 0, 0), Vector(0, 0, 0)
+            return comps
+        comps = self.free.pop()
+        comps.t = t
+        comps.obj = obj
+        return comps
+
+    def release(self, comps):
+        self.free.append(comps)
+
+    def __reduce__(self):
+        return ComputationsPool, ()
+
+
 class Intersections(list):
     def __init__(self, *args):
         super(Intersections, self).__init__(args)
         self.count = len(args)
 
     def hit(self):
-        return min([i for i in self if i.t > 0], default=None)
+        hit = None
+        for i in self:
+            if i.t > 0 and (hit is None or i.t < hit.t):
+                hit = i
+        return hit
 
     def append(self, obj):
         super().append(obj)
@@ -89,3 +161,47 @@ class Intersections(list):
     def extend(self, iterable):
         super().extend(iterable)
         self.count += len(iterable)
+
+
+class IntersectionRecord:
+    """
+    Intersections kept as parallel arrays of t values and objects, in the order they were found and without sorting.
+    hit() scans them once for the smallest positive t; on ties the one found first wins, as with Intersections.
+    """
+    __slots__ = ('ts', 'objects')
+
+    def __init__(self):
+        self.ts = array('d')
+        self.objects = []
+
+    def __len__(self):
+        return len(self.ts)
+
+    def add(self, t, obj):
+        self.ts.append(t)
+        self.objects.append(obj)
+
+    def extend(self, xs):
+        for i in xs:
+            self.ts.append(i.t)
+            self.objects.append(i.obj)
+
+    def clear(self):
+        del self.ts[:]
+        self.objects.clear()
+
+    def hit_index(self):
+        index, hit_t = None, float('inf')
+        for i, t in enumerate(self.ts):
+            if 0 < t < hit_t:
+                index, hit_t = i, t
+        return index
+
+    def hit(self):
+        index = self.hit_index()
+        return None if index is None else Intersection(self.ts[index], self.objects[index])
+
+    def intersections(self):
+        xs = Intersections(*(Intersection(t, obj) for t, obj in zip(self.ts, self.objects)))
+        xs.sort()
+        return xs
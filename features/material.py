@@ -1,5 +1,3 @@
-import numpy as np
-
 from features.tuple import Color
 
 
@@ -22,23 +20,20 @@ class Material:
 
     def lighting(self, obj, light, point, eye, normal, in_shadow=False):
         color = self.color if self.pattern is None else self.pattern.stripe_at_object(obj, point)
-        diffuse = Color(0, 0, 0)
-        specular = Color(0, 0, 0)
         effective_color = color * light.intensity
-        light_v = (light.position - point).normalize()
-        ambient = effective_color * self.ambient
+        result = effective_color * self.ambient
         if in_shadow:
-            return ambient
+            return result
 
+        light_v = light.position.sub_normalize(point)
         light_dot_normal = light_v.dot(normal)
 
         if light_dot_normal >= 0:
-            diffuse = effective_color * self.diffuse * light_dot_normal
-            reflect_v = -light_v.reflect(normal)
-            reflect_dot_eye = reflect_v.dot(eye)
+            result.iadd_scaled(effective_color, self.diffuse * light_dot_normal)
+            reflect_dot_eye = -light_v.reflect(normal).dot(eye)
 
             if reflect_dot_eye >= 0:
-                factor = np.power(reflect_dot_eye, self.shininess)
-                specular = light.intensity * self.specular * factor
+                factor = reflect_dot_eye ** self.shininess
+                result.iadd_scaled(light.intensity, self.specular * factor)
 
-        return ambient + diffuse + specular
+        return result
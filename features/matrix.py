@@ -1,27 +1,44 @@
 import numpy as np
 
-from features.tuple import Tuple
+from features.tuple import Tuple, Point, Vector, TupleArray
 
 
 class Matrix:
+    """
+    Square matrix. `affine` marks 4x4 matrices known to have a last row of (0, 0, 0, 1), which are inverted in closed
+    form from their 3x3 adjugate and translation column; products of affine matrices stay affine.
+
+    revision counts in-place edits to any matrix, so that structures built over a scene (see World.accelerator) notice a
+    shape's transform changing without it being reassigned.
+    """
+    revision = 0
+
     def __init__(self, matrix):
         self.size = len(matrix)
         if len(matrix[0]) != self.size:
             raise Exception
         self.matrix = np.array(matrix)
+        self.affine = False
+        self._inverse = None
+        self._inverse_transpose = None
+        self._rows = None
 
     def __getitem__(self, key):
         return self.matrix[key]
 
     def __setitem__(self, key, value):
         self.matrix[key] = value
+        self.invalidate()
 
     def __eq__(self, other):
         return np.allclose(self.matrix, other.matrix, rtol=10 ** -4) if isinstance(other, Matrix) else False
 
     def __matmul__(self, other):
         if isinstance(other, Matrix):
-            return Matrix(self.matrix @ other.matrix)
+            product = Matrix(self.matrix @ other.matrix)
+            if self.affine and other.affine:
+                product.affine = True
+            return product
         else:
             print("Invalid Matrix")
 
@@ -31,14 +48,14 @@ class Matrix:
         elif isinstance(other, int) or isinstance(other, float):
             return Matrix(self.matrix * other)
         elif isinstance(other, Tuple):
-            return Tuple(
-                Tuple(*(self[0])).dot(other),
-                Tuple(*(self[1])).dot(other),
-                Tuple(*(self[2])).dot(other),
-                Tuple(*(self[3])).dot(other),
-            )
+            (a, b, c, d), (e, f, g, h), (i, j, k, l), (m, n, o, p) = self.rows()
+            x, y, z, w = other.x, other.y, other.z, other.w
+            return Tuple(a * x + b * y + c * z + d * w, e * x + f * y + g * z + h * w,
+                         i * x + j * y + k * z + l * w, m * x + n * y + o * z + p * w)
+        elif isinstance(other, TupleArray):
+            return TupleArray(other.data @ self.matrix.T)
         else:
-            print("Cannot multiply Matrix by anything apart from Matrix, Integer, Float, or Tuple")
+            print("Cannot multiply Matrix by anything apart from Matrix, Integer, Float, Tuple or TupleArray")
 
     def __rmul__(self, other):
         return self.__mul__(other)
@@ -51,7 +68,9 @@ class Matrix:
 
     @staticmethod
     def identity(size):
-        return Matrix(np.eye(size))
+        m = Matrix(np.eye(size))
+        m.affine = size == 4
+        return m
 
     def transpose(self):
         return Matrix(self.matrix.T)
@@ -62,22 +81,100 @@ class Matrix:
     def invertible(self):
         return self.determinant() != 0
 
+    def rows(self):
+        """
+        The matrix as nested lists of Python floats, so per-tuple arithmetic does not box numpy scalars.
+        """
+        if self._rows is None:
+            self._rows = self.matrix.tolist()
+        return self._rows
+
+    def transform_point(self, point):
+        (a, b, c, d), (e, f, g, h), (i, j, k, l), (m, n, o, p) = self.rows()
+        x, y, z = point.x, point.y, point.z
+        return Point(a * x + b * y + c * z + d, e * x + f * y + g * z + h, i * x + j * y + k * z + l,
+                     m * x + n * y + o * z + p)
+
+    def transform_vector(self, vector):
+        (a, b, c, _), (e, f, g, _), (i, j, k, _), _ = self.rows()
+        x, y, z = vector.x, vector.y, vector.z
+        return Vector(a * x + b * y + c * z, e * x + f * y + g * z, i * x + j * y + k * z)
+
+    def invalidate(self):
+        """
+        Drops the cached rows, inverse and inverse-transpose, and bumps revision. Must be called after mutating `matrix`
+        in place.
+        """
+        Matrix.revision += 1
+        self.affine = False
+        if self._inverse is not None and self._inverse._inverse is self:
+            self._inverse._inverse = None
+            self._inverse._inverse_transpose = None
+        self._inverse = None
+        self._inverse_transpose = None
+        self._rows = None
+
     def inverse(self):
-        if self.invertible():
-            return Matrix(np.linalg.inv(self.matrix))
-        else:
+        """
+        The cached inverse, linked back to this matrix so that inverting it again is free. It is read-only, as it is
+        shared by every caller.
+        """
+        if self._inverse is None:
+            self._inverse = self._invert()
+            self._inverse.matrix.flags.writeable = False
+            self._inverse._inverse = self
+        return self._inverse
+
+    def _invert(self):
+        if self.affine:
+            return self._affine_inverse()
+        if not self.invertible():
+            raise Exception
+        return Matrix(np.linalg.inv(self.matrix))
+
+    def _affine_inverse(self):
+        (a, b, c, x), (d, e, f, y), (g, h, i, z), _ = self.rows()
+        co_a, co_b, co_c = e * i - f * h, f * g - d * i, d * h - e * g
+        det = a * co_a + b * co_b + c * co_c
+        if not det:
             raise Exception
 
+        inv = [[co_a / det, (c * h - b * i) / det, (b * f - c * e) / det],
+               [co_b / det, (a * i - c * g) / det, (c * d - a * f) / det],
+               [co_c / det, (b * g - a * h) / det, (a * e - b * d) / det]]
+        m = Matrix([row + [-(row[0] * x + row[1] * y + row[2] * z)] for row in inv] + [[0, 0, 0, 1]])
+        m.affine = True
+        return m
+
+    def inverse_transpose(self):
+        if self._inverse_transpose is None:
+            self._inverse_transpose = self.inverse().transpose()
+            self._inverse_transpose.matrix.flags.writeable = False
+        return self._inverse_transpose
+
 
 class Translation(Matrix):
     def __init__(self, x, y, z):
         super().__init__(np.eye(4))
         self.matrix[:3, 3] = [x, y, z]
+        self.affine = True
+
+    def _affine_inverse(self):
+        rows = self.rows()
+        return Translation(-rows[0][3], -rows[1][3], -rows[2][3])
 
 
 class Scaling(Matrix):
     def __init__(self, x, y, z):
         super().__init__(np.diag([x, y, z, 1]))
+        self.affine = True
+
+    def _affine_inverse(self):
+        rows = self.rows()
+        x, y, z = rows[0][0], rows[1][1], rows[2][2]
+        if not (x and y and z):
+            raise Exception
+        return Scaling(1 / x, 1 / y, 1 / z)
 
 
 class Rotation(Matrix):
@@ -100,6 +197,12 @@ class Rotation(Matrix):
             matrix = matrix_z @ matrix
 
         super().__init__(matrix)
+        self.affine = True
+
+    def _affine_inverse(self):
+        m = Matrix(self.matrix.T)
+        m.affine = True
+        return m
 
 
 class Shearing(Matrix):
@@ -107,6 +210,7 @@ class Shearing(Matrix):
         matrix = np.eye(4)
         matrix[:3, :3] = [[1, x_y, x_z], [y_x, 1, y_z], [z_x, z_y, 1]]
         super().__init__(matrix)
+        self.affine = True
 
 
 def view_transform(source, dest, up):
@@ -121,4 +225,5 @@ def view_transform(source, dest, up):
             [0, 0, 0, 1],
         ]
     )
+    orientation.affine = True
     return orientation * Translation(-source.x, -source.y, -source.z)
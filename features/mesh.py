@@ -0,0 +1,163 @@
+import numpy as np
+
+from features.bounds import Bounds, slab_test
+from features.intersection import Intersection, Intersections
+from features.shape import Shape
+from features.tuple import Point, Vector
+
+
+class Mesh(Shape):
+    """
+    Triangle mesh kept in contiguous arrays: vertices (N x 3), faces (M x 3 vertex indices) and, per face, the first
+    corner p1, the edges e1 = p2 - p1 and e2 = p3 - p1 and the normal, as Triangle computes them. normals optionally
+    gives per-corner vertex normals (M x 3 x 3) that are interpolated across each face.
+
+    Faces are reordered so that every leaf of the internal BVH covers a contiguous range of them; a ray gathers the
+    ranges of the leaves it passes through and intersects them all at once with a vectorised Möller–Trumbore test. Hits
+    are reported on MeshFace objects, so World.shade_hit works on meshes as on any other shape.
+    """
+    def __init__(self, vertices, faces, normals=None, transform=None, material=None, leaf_size=8):
+        super().__init__(transform, material)
+        self.vertices = np.ascontiguousarray(vertices, dtype=float).reshape(-1, 3)
+        faces = np.asarray(faces, dtype=np.int64).reshape(-1, 3)
+        corners = self.vertices[faces]
+        self.nodes, order = build_face_bvh(corners.min(axis=1), corners.max(axis=1), max(1, leaf_size))
+
+        self.faces = np.ascontiguousarray(faces[order])
+        self.normals = None if normals is None else np.ascontiguousarray(np.asarray(normals, dtype=float)[order])
+        corners = corners[order]
+        self.p1 = np.ascontiguousarray(corners[:, 0])
+        self.e1 = np.ascontiguousarray(corners[:, 1] - corners[:, 0])
+        self.e2 = np.ascontiguousarray(corners[:, 2] - corners[:, 0])
+        face_normals = np.cross(self.e2, self.e1)
+        lengths = np.linalg.norm(face_normals, axis=1)
+        self.face_normals = face_normals / np.where(lengths == 0, 1, lengths)[:, None]
+
+    def bounds(self):
+        if not len(self.faces):
+            self.box = Bounds()
+            return
+        corners = self.vertices[self.faces]
+        minimum, maximum = corners.min(axis=(0, 1)), corners.max(axis=(0, 1))
+        self.box = Bounds(Point(*minimum.tolist()), Point(*maximum.tolist()))
+
+    def candidates(self, ray, t_max=None):
+        """
+        Indices of the faces in the BVH leaves whose boxes the ray passes through (before t_max when given).
+        """
+        if not self.nodes:
+            return np.empty(0, dtype=np.int64)
+        origin, (ix, iy, iz) = ray.origin, ray.inv_direction
+        ranges = []
+        stack = [0]
+        while stack:
+            index = stack.pop()
+            minimum, maximum, right, start, count = self.nodes[index]
+            if not slab_test(origin.x, origin.y, origin.z, ix, iy, iz, minimum, maximum, t_max)[0]:
+                continue
+            if count:
+                ranges.append(np.arange(start, start + count))
+            else:
+                stack.append(right)
+                stack.append(index + 1)
+        return np.concatenate(ranges) if ranges else np.empty(0, dtype=np.int64)
+
+    def intersect_faces(self, ray, faces):
+        """
+        Möller–Trumbore for one ray against the given faces; returns (t, u, v, hit) arrays.
+        """
+        direction = np.array([ray.direction.x, ray.direction.y, ray.direction.z])
+        origin = np.array([ray.origin.x, ray.origin.y, ray.origin.z])
+        e1, e2 = self.e1[faces], self.e2[faces]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dir_cross_e2 = np.cross(direction, e2)
+            det = np.einsum('ij,ij->i', e1, dir_cross_e2)
+            f = 1 / det
+            p1_to_origin = origin - self.p1[faces]
+            u = f * np.einsum('ij,ij->i', p1_to_origin, dir_cross_e2)
+            origin_cross_e1 = np.cross(p1_to_origin, e1)
+            v = f * (origin_cross_e1 @ direction)
+            t = f * np.einsum('ij,ij->i', e2, origin_cross_e1)
+        hit = (np.abs(det) >= 0.00001) & (u >= 0) & (u <= 1) & (v >= 0) & (u + v <= 1)
+        return t, u, v, hit
+
+    def local_intersect(self, ray):
+        faces = self.candidates(ray)
+        t, u, v, hit = self.intersect_faces(ray, faces)
+        xs = Intersections(*(Intersection(t[i], MeshFace(self, faces[i], u[i], v[i])) for i in np.flatnonzero(hit)))
+        xs.sort()
+        return xs
+
+    def local_any_hit(self, ray, t_max):
+        t, _, _, hit = self.intersect_faces(ray, self.candidates(ray, t_max))
+        return bool(np.any(hit & (t > 0) & (t < t_max)))
+
+    def local_closest_hit(self, ray, t_max):
+        faces = self.candidates(ray, t_max)
+        t, u, v, hit = self.intersect_faces(ray, faces)
+        t = np.where(hit & (t > 0) & (t < t_max), t, np.inf)
+        if not len(t):
+            return None
+        i = np.argmin(t)
+        return None if t[i] == np.inf else Intersection(t[i], MeshFace(self, faces[i], u[i], v[i]))
+
+    def normal(self, index, u, v):
+        if self.normals is None:
+            return Vector(*self.face_normals[index].tolist())
+        n1, n2, n3 = self.normals[index]
+        return Vector(*(n2 * u + n3 * v + n1 * (1 - u - v)).tolist())
+
+
+class MeshFace(Shape):
+    """
+    One face of a Mesh as hit by a ray, with the barycentric u and v of the hit. It shares the mesh's transform,
+    parent and material, and stands for the mesh when refraction tracks which objects a ray is inside.
+    """
+    def __init__(self, mesh, index, u, v):
+        self.mesh = mesh
+        self.index = int(index)
+        self.u = u
+        self.v = v
+        self._transform = mesh.transform
+        self.parent = mesh.parent
+        self.material = mesh.material
+        self.box = None
+
+    @property
+    def solid(self):
+        return self.mesh
+
+    def local_normal_at(self, point):
+        return self.mesh.normal(self.index, self.u, self.v)
+
+
+def build_face_bvh(face_min, face_max, leaf_size):
+    """
+    BVH over faces given by their bounding corners, split at the median along the widest axis of the face centroids.
+    Returns the nodes as (minimum, maximum, right, start, count) tuples in depth-first order, as in FlatBVH, and the
+    face order that makes every leaf a contiguous range.
+    """
+    centroids = (face_min + face_max) / 2
+    order = np.arange(len(face_min))
+    nodes = []
+
+    def build(start, end):
+        index = len(nodes)
+        faces = order[start:end]
+        minimum, maximum = face_min[faces].min(axis=0).tolist(), face_max[faces].max(axis=0).tolist()
+        nodes.append([Point(*minimum), Point(*maximum), -1, start, 0])
+        if end - start <= leaf_size:
+            nodes[index][4] = end - start
+            return index
+
+        points = centroids[faces]
+        axis = np.argmax(points.max(axis=0) - points.min(axis=0))
+        middle = (end - start) // 2
+        order[start:end] = faces[np.argpartition(points[:, axis], middle)]
+        build(start, start + middle)
+        nodes[index][2] = build(start + middle, end)
+        return index
+
+    if len(order):
+        build(0, len(order))
+    return [tuple(node) for node in nodes], order
@@ -0,0 +1,189 @@
+import json
+import os
+from array import array
+
+import numpy as np
+
+from features.group import Group
+from features.mesh import Mesh
+
+CACHE_MAGIC = b'RTOBJ\x00\x01\x00'
+DEFAULT_GROUP = ''
+
+
+class ObjFile:
+    """
+    Geometry of a Wavefront OBJ file: vertices (N x 3), vertex normals (K x 3) and, per group, faces (M x 3 vertex
+    indices) and face_normals (M x 3 normal indices, -1 where a face gave none), all zero-based. Polygons are split
+    into fans of triangles. Faces before the first `g` statement belong to DEFAULT_GROUP; `ignored` counts the lines
+    that were not understood.
+    """
+    def __init__(self, vertices, normals, groups, ignored=0):
+        self.vertices = vertices
+        self.normals = normals
+        self.groups = groups
+        self.ignored = ignored
+
+    @staticmethod
+    def parse(lines):
+        """
+        Parses an iterable of lines, e.g. an open file, one line at a time; vertices and indices go straight into flat
+        typed arrays, so no per-line objects are kept.
+        """
+        vertices, normals = array('d'), array('d')
+        groups = {DEFAULT_GROUP: (array('q'), array('q'))}
+        faces, face_normals = groups[DEFAULT_GROUP]
+        ignored = 0
+
+        def index(value, count):
+            i = int(value)
+            if 0 < i <= count:
+                return i - 1
+            if i < 0 and -i <= count:
+                return count + i
+            raise Exception
+
+        for line in lines:
+            fields = line.split()
+            if not fields:
+                continue
+            keyword = fields[0]
+            if keyword == 'v' and len(fields) >= 4:
+                vertices.extend((float(fields[1]), float(fields[2]), float(fields[3])))
+            elif keyword == 'vn' and len(fields) >= 4:
+                normals.extend((float(fields[1]), float(fields[2]), float(fields[3])))
+            elif keyword == 'f' and len(fields) >= 4:
+                corners = []
+                for field in fields[1:]:
+                    v, _, rest = field.partition('/')
+                    n = rest.partition('/')[2]
+                    corners.append((index(v, len(vertices) // 3), index(n, len(normals) // 3) if n else -1))
+                for i in range(1, len(corners) - 1):
+                    for v, n in (corners[0], corners[i], corners[i + 1]):
+                        faces.append(v)
+                        face_normals.append(n)
+            elif keyword == 'g':
+                faces, face_normals = groups.setdefault(' '.join(fields[1:]), (array('q'), array('q')))
+            else:
+                ignored += 1
+        return ObjFile(np.frombuffer(vertices, dtype=float).reshape(-1, 3),
+                       np.frombuffer(normals, dtype=float).reshape(-1, 3),
+                       {name: (np.frombuffer(f, dtype=np.int64).reshape(-1, 3),
+                               np.frombuffer(n, dtype=np.int64).reshape(-1, 3)) for name, (f, n) in groups.items()},
+                       ignored)
+
+    @staticmethod
+    def load(path, cache=True):
+        """
+        Reads the OBJ file at path. With cache set, the parsed arrays are also written to path + '.cache', and later
+        loads of an unchanged file (same size and modification time) map that file into memory instead of parsing. A
+        cache that cannot be written, e.g. next to a read-only model, is skipped.
+        """
+        if cache:
+            obj = ObjFile.read_cache(path)
+            if obj is not None:
+                return obj
+        with open(path) as f:
+            obj = ObjFile.parse(f)
+        if cache:
+            try:
+                obj.write_cache(path)
+            except OSError:
+                pass
+        return obj
+
+    def arrays(self):
+        yield 'vertices', self.vertices
+        yield 'normals', self.normals
+        for i, (faces, face_normals) in enumerate(self.groups.values()):
+            yield f'faces{i}', faces
+            yield f'face_normals{i}', face_normals
+
+    def write_cache(self, path):
+        """
+        Writes the cache: CACHE_MAGIC, the length of a JSON header, the header (source size and modification time,
+        group names, and the offset, dtype and shape of every array) and the raw arrays, each 8-byte aligned. It goes
+        to a temporary file first, so a reader never sees a half-written cache, and is removed if writing fails.
+        """
+        stat = os.stat(path)
+        layout, offset = {}, 0
+        for name, data in self.arrays():
+            layout[name] = (offset, data.dtype.str, data.shape)
+            offset += data.nbytes
+        header = json.dumps({'size': stat.st_size, 'mtime': stat.st_mtime_ns, 'groups': list(self.groups),
+                             'ignored': self.ignored, 'arrays': layout}).encode()
+        header += b' ' * (-(len(CACHE_MAGIC) + 8 + len(header)) % 8)
+
+        temporary = f'{path}.cache.{os.getpid()}'
+        try:
+            with open(temporary, 'wb') as f:
+                f.write(CACHE_MAGIC)
+                f.write(len(header).to_bytes(8, 'little'))
+                f.write(header)
+                for _, data in self.arrays():
+                    f.write(np.ascontiguousarray(data).tobytes())
+            os.replace(temporary, f'{path}.cache')
+        except BaseException:
+            if os.path.exists(temporary):
+                os.remove(temporary)
+            raise
+
+    @staticmethod
+    def read_cache(path):
+        """
+        The ObjFile stored in path's cache with its arrays memory-mapped, or None when there is no cache, it was written
+        for a different version of the source, or it is truncated or otherwise unreadable.
+        """
+        try:
+            stat = os.stat(path)
+            with open(f'{path}.cache', 'rb') as f:
+                if f.read(len(CACHE_MAGIC)) != CACHE_MAGIC:
+                    return None
+                length = int.from_bytes(f.read(8), 'little')
+                header = json.loads(f.read(length))
+                size = os.fstat(f.fileno()).st_size
+            if header['size'] != stat.st_size or header['mtime'] != stat.st_mtime_ns:
+                return None
+
+            start = len(CACHE_MAGIC) + 8 + length
+            arrays = {}
+            for name, (offset, dtype, shape) in header['arrays'].items():
+                dtype, shape = np.dtype(dtype), tuple(shape)
+                count = int(np.prod(shape))
+                if offset < 0 or start + offset + count * dtype.itemsize > size:
+                    return None
+                arrays[name] = np.memmap(f'{path}.cache', dtype=dtype, mode='r', offset=start + offset,
+                                         shape=shape) if count else np.empty(shape, dtype=dtype)
+
+            groups = {name: (arrays[f'faces{i}'], arrays[f'face_normals{i}'])
+                      for i, name in enumerate(header['groups'])}
+            return ObjFile(arrays['vertices'], arrays['normals'], groups, header['ignored'])
+        except (OSError, KeyError, TypeError, ValueError):
+            return None
+
+    def mesh(self, name=DEFAULT_GROUP, leaf_size=8):
+        """
+        Mesh of the faces of one group. Every mesh shares the file's vertex array; faces whose corners all have
+        normals are smooth-shaded, the others keep their flat normal.
+        """
+        faces, face_normals = self.groups[name]
+        normals = None
+        if len(faces) and (face_normals >= 0).any():
+            corners = self.vertices[faces]
+            flat = np.cross(corners[:, 2] - corners[:, 0], corners[:, 1] - corners[:, 0])
+            lengths = np.linalg.norm(flat, axis=1)
+            flat /= np.where(lengths == 0, 1, lengths)[:, None]
+            smooth = (face_normals >= 0).all(axis=1)
+            normals = np.repeat(flat[:, None], 3, axis=1)
+            normals[smooth] = self.normals[face_normals[smooth]]
+        return Mesh(self.vertices, faces, normals, leaf_size=leaf_size)
+
+    def to_group(self, leaf_size=8):
+        """
+        Group holding one Mesh per non-empty group of the file.
+        """
+        group = Group()
+        for name, (faces, _) in self.groups.items():
+            if len(faces):
+                group.add_child(self.mesh(name, leaf_size))
+        return group
@@ -17,7 +17,8 @@ class Pattern:
         pass
 
     def stripe_at_object(self, obj, world_point):
-        return self.color_at(self.transform.inverse() * obj.transform.inverse() * world_point)
+        object_point = obj.transform.inverse().transform_point(world_point)
+        return self.color_at(self.transform.inverse().transform_point(object_point))
 
 
 class Test(Pattern):
@@ -1,13 +1,27 @@
 class Ray:
+    __slots__ = ('origin', 'direction', '_inv_direction')
+
     def __init__(self, origin, direction):
         self.origin = origin
         self.direction = direction
+        self._inv_direction = None
+
+    @property
+    def inv_direction(self):
+        """
+        (1 / dx, 1 / dy, 1 / dz) for the slab tests in features.bounds, computed on first use. Components closer to zero
+        than 0.00001 give infinity, as the box tests have always treated them.
+        """
+        if self._inv_direction is None:
+            self._inv_direction = tuple(1 / d if abs(d) >= 0.00001 else float('inf')
+                                        for d in (self.direction.x, self.direction.y, self.direction.z))
+        return self._inv_direction
 
     def position(self, time):
-        return self.origin + time * self.direction
+        return self.origin.add_scaled(self.direction, time)
 
     def transform(self, m):
-        return Ray(m * self.origin, m * self.direction)
+        return Ray(m.transform_point(self.origin), m.transform_vector(self.direction))
 
     def __str__(self):
         return f"Ray: {{Origin: {self.origin}, Direction: {self.direction}}}"
@@ -1,3 +1,5 @@
+import numpy as np
+
 from features.bounds import Bounds
 from features.intersection import Intersections, Intersection
 from features.material import Material
@@ -6,12 +8,39 @@ from features.tuple import Point, Vector
 
 
 class Shape:
+    """
+    revision counts changes to any shape's transform or to a group's children, so that structures built over a scene
+    (see World.accelerator) can tell when they are out of date. Building a shape does not count, as it is in no scene
+    yet. Editing a transform in place is tracked by Matrix.revision instead; for a shape inside a group, call
+    set_transform afterwards so the group's cached bounds are recomputed too.
+    """
+    revision = 0
+
     def __init__(self, transform=None, material=None, parent=None):
-        self.transform = Matrix.identity(4) if not transform else transform
-        self.material = Material() if not material else material
         self.parent = parent
+        self._transform = Matrix.identity(4) if not transform else transform
+        self.material = Material() if not material else material
         self.box = None
 
+    @property
+    def transform(self):
+        return self._transform
+
+    @transform.setter
+    def transform(self, t):
+        self._transform = t
+        Shape.revision += 1
+        if self.parent:
+            self.parent.invalidate_bounds()
+
+    @property
+    def solid(self):
+        """
+        The object a ray is inside after crossing this shape's surface, for refraction; parts of a larger object such as
+        mesh faces return that object.
+        """
+        return self
+
     def set_transform(self, t):
         self.transform = t
 
@@ -29,19 +58,60 @@ class Shape:
     def local_intersect(self, ray):
         pass
 
+    def intersect_into(self, ray, record):
+        """
+        Adds the ray's intersections to an IntersectionRecord instead of returning them.
+        """
+        self.local_intersect_into(ray.transform(self.transform.inverse()), record)
+
+    def local_intersect_into(self, ray, record):
+        record.extend(self.local_intersect(ray))
+
+    def any_hit(self, ray, t_max):
+        """
+        Occlusion query: True as soon as any intersection lies strictly between 0 and t_max.
+        """
+        return self.local_any_hit(ray.transform(self.transform.inverse()), t_max)
+
+    def local_any_hit(self, ray, t_max):
+        return any(0 < i.t < t_max for i in self.local_intersect(ray))
+
+    def closest_hit(self, ray, t_max=float('inf')):
+        """
+        The intersection with the smallest t strictly between 0 and t_max, or None.
+        """
+        return self.local_closest_hit(ray.transform(self.transform.inverse()), t_max)
+
+    def local_closest_hit(self, ray, t_max):
+        hit = None
+        for i in self.local_intersect(ray):
+            if 0 < i.t < t_max:
+                hit, t_max = i, i.t
+        return hit
+
+    def intersect_packet(self, origins, directions):
+        """
+        Intersects N rays at once, given as TupleArrays of origins and directions. Returns (t, hit): N x k arrays of t
+        values and a mask of which entries are real intersections, laid out like local_intersect's results; entries
+        that are not intersections hold infinity.
+        """
+        inverse = self.transform.inverse()
+        return self.local_intersect_packet(inverse * origins, inverse * directions)
+
+    def local_intersect_packet(self, origins, directions):
+        pass
+
     def world_to_object(self, point):
         if self.parent:
             point = self.parent.world_to_object(point)
 
-        return self.transform.inverse() * point
+        return self.transform.inverse().transform_point(point)
 
     def bounds(self):
         pass
 
     def normal_to_world(self, normal):
-        normal = self.transform.inverse().transpose() * normal
-        normal.w = 0
-        normal = normal.normalize()
+        normal = self.transform.inverse_transpose().transform_vector(normal).normalize()
 
         if self.parent:
             normal = self.parent.normal_to_world(normal)
@@ -89,6 +159,41 @@ class Sphere(Shape):
         t2 = (-b + d ** 0.5) / (2 * a)
         return Intersections(Intersection(t1, self), Intersection(t2, self))
 
+    def local_closest_hit(self, ray, t_max):
+        sphere_to_ray = ray.origin - self.origin
+
+        a = ray.direction.dot(ray.direction)
+        b = 2 * ray.direction.dot(sphere_to_ray)
+        c = sphere_to_ray.dot(sphere_to_ray) - 1
+
+        d = b ** 2 - 4 * a * c
+
+        if d < 0:
+            return None
+
+        for t in ((-b - d ** 0.5) / (2 * a), (-b + d ** 0.5) / (2 * a)):
+            if 0 < t < t_max:
+                return Intersection(t, self)
+        return None
+
+    def local_intersect_packet(self, origins, directions):
+        """
+        Column 0 of t holds the near and column 1 the far intersection of each ray.
+        """
+        sphere_to_ray = origins - self.origin
+
+        a = directions.dot(directions)
+        b = 2 * directions.dot(sphere_to_ray)
+        c = sphere_to_ray.dot(sphere_to_ray) - 1
+
+        d = b ** 2 - 4 * a * c
+        hit = d >= 0
+        root = np.sqrt(np.where(hit, d, 0))
+
+        t = np.column_stack(((-b - root) / (2 * a), (-b + root) / (2 * a)))
+        t[~hit] = np.inf
+        return t, np.column_stack((hit, hit))
+
     @staticmethod
     def glassy():
         s = Sphere()
@@ -112,6 +217,12 @@ class Plane(Shape):
             return Intersections()
         return Intersections(Intersection(-ray.origin.y / ray.direction.y, self))
 
+    def local_intersect_packet(self, origins, directions):
+        hit = np.abs(directions.y) >= 0.00001
+        t = np.full(len(origins), np.inf)
+        t[hit] = -origins.y[hit] / directions.y[hit]
+        return t[:, None], hit[:, None]
+
     def bounds(self):
         self.box = Bounds(minimum=Point(-float('inf'), 0, -float('inf')), maximum=Point(float('inf'), 0, float('inf')))
 
@@ -139,6 +250,25 @@ class Cube(Shape):
         return Intersections(Intersection(t_min, self),
                              Intersection(t_max, self)) if t_min <= t_max else Intersections()
 
+    def local_intersect_packet(self, origins, directions):
+        def check_axis(origin, direction):
+            t_min_numerator = (-1 - origin)
+            t_max_numerator = (1 - origin)
+            parallel = np.abs(direction) < 0.00001
+            t_min = np.where(parallel, t_min_numerator * np.inf, t_min_numerator / direction)
+            t_max = np.where(parallel, t_max_numerator * np.inf, t_max_numerator / direction)
+            return np.minimum(t_min, t_max), np.maximum(t_min, t_max)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            x_t_min, x_t_max = check_axis(origins.x, directions.x)
+            y_t_min, y_t_max = check_axis(origins.y, directions.y)
+            z_t_min, z_t_max = check_axis(origins.z, directions.z)
+        t = np.column_stack((np.maximum(np.maximum(x_t_min, y_t_min), z_t_min),
+                             np.minimum(np.minimum(x_t_max, y_t_max), z_t_max)))
+        hit = t[:, 0] <= t[:, 1]
+        t[~hit] = np.inf
+        return t, np.column_stack((hit, hit))
+
     def local_normal_at(self, point):
         max_c = max(abs(point.x), abs(point.y), abs(point.z))
         if max_c == abs(point.x):
@@ -198,6 +328,37 @@ class Cylinder(Shape):
         if check_cap(ray, t):
             xs.append(Intersection(t, self))
 
+    def local_intersect_packet(self, origins, directions):
+        """
+        Columns 0 and 1 hold the wall intersections, 2 and 3 those with the minimum and maximum caps.
+        """
+        t = np.full((len(origins), 4), np.inf)
+        hit = np.zeros(t.shape, dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = directions.x ** 2 + directions.z ** 2
+            b = 2 * origins.x * directions.x + 2 * origins.z * directions.z
+            c = origins.x ** 2 + origins.z ** 2 - 1
+            disc = b ** 2 - 4 * a * c
+            missed = (a >= 0.00001) & (disc < 0)
+            walls = (a >= 0.00001) & (disc >= 0)
+            intersect_walls_packet(self, origins, directions, a, b, disc, walls, t, hit)
+            self.intersect_caps_packet(origins, directions, ~missed, t, hit)
+        return t, hit
+
+    def intersect_caps_packet(self, origins, directions, candidates, t, hit):
+        def check_cap(t):
+            x = origins.x + t * directions.x
+            z = origins.z + t * directions.z
+            return x ** 2 + z ** 2 <= 1
+
+        if not self.closed:
+            return
+        candidates = candidates & (np.abs(directions.y) >= 0.00001)
+        for column, limit in ((2, self.minimum), (3, self.maximum)):
+            cap_t = (limit - origins.y) / directions.y
+            hit[:, column] = candidates & check_cap(cap_t)
+            t[hit[:, column], column] = cap_t[hit[:, column]]
+
     def local_normal_at(self, point):
         dist = point.x ** 2 + point.z ** 2
         if dist < 1 and point.y >= self.maximum - 0.00001:
@@ -261,6 +422,41 @@ class Cone(Shape):
         if check_cap(ray, t, self.maximum):
             xs.append(Intersection(t, self))
 
+    def local_intersect_packet(self, origins, directions):
+        """
+        Columns 0 and 1 hold the wall intersections, 2 and 3 those with the minimum and maximum caps.
+        """
+        t = np.full((len(origins), 4), np.inf)
+        hit = np.zeros(t.shape, dtype=bool)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            a = directions.x ** 2 - directions.y ** 2 + directions.z ** 2
+            b = 2 * origins.x * directions.x - 2 * origins.y * directions.y + 2 * origins.z * directions.z
+            c = origins.x ** 2 - origins.y ** 2 + origins.z ** 2
+            disc = b ** 2 - 4 * a * c
+            missed = (np.abs(a) >= 0.00001) & (disc < 0)
+            walls = (np.abs(a) >= 0.00001) & (disc >= 0)
+            intersect_walls_packet(self, origins, directions, a, b, disc, walls, t, hit)
+
+            single = (np.abs(a) < 0.00001) & (np.abs(b) >= 0.00001)
+            t[single, 0] = -c[single] / (2 * b[single])
+            hit[:, 0] |= single
+            self.intersect_caps_packet(origins, directions, ~missed, t, hit)
+        return t, hit
+
+    def intersect_caps_packet(self, origins, directions, candidates, t, hit):
+        def check_cap(t, y):
+            x = origins.x + t * directions.x
+            z = origins.z + t * directions.z
+            return x ** 2 + z ** 2 <= y ** 2
+
+        if not self.closed:
+            return
+        candidates = candidates & (np.abs(directions.y) >= 0.00001)
+        for column, limit in ((2, self.minimum), (3, self.maximum)):
+            cap_t = (limit - origins.y) / directions.y
+            hit[:, column] = candidates & check_cap(cap_t, limit)
+            t[hit[:, column], column] = cap_t[hit[:, column]]
+
     def local_normal_at(self, point):
         dist = point.x ** 2 + point.z ** 2
         if dist < 1 and point.y >= self.maximum - 0.00001:
@@ -274,7 +470,8 @@ class Cone(Shape):
             return Vector(point.x, y, point.z)
 
     def bounds(self):
-        self.box = Bounds(minimum=Point(-1, self.minimum, -1), maximum=Point(1, self.maximum, 1))
+        limit = max(abs(self.minimum), abs(self.maximum))
+        self.box = Bounds(minimum=Point(-limit, self.minimum, -limit), maximum=Point(limit, self.maximum, limit))
 
 
 class Triangle(Shape):
@@ -290,6 +487,11 @@ class Triangle(Shape):
     def local_normal_at(self, point):
         return self.normal
 
+    def bounds(self):
+        self.box = Bounds()
+        for point in (self.p1, self.p2, self.p3):
+            self.box.add_point(point)
+
     def local_intersect(self, ray):
         xs = Intersections()
         dir_cross_e2 = ray.direction.cross(self.e2)
@@ -313,3 +515,32 @@ class Triangle(Shape):
 
         t = f * self.e2.dot(origin_cross_e1)
         return Intersections(Intersection(t, self))
+
+    def local_intersect_packet(self, origins, directions):
+        with np.errstate(divide='ignore', invalid='ignore'):
+            dir_cross_e2 = directions.cross(self.e2)
+            det = dir_cross_e2.dot(self.e1)
+            f = 1 / det
+            p1_to_origin = origins - self.p1
+            u = f * p1_to_origin.dot(dir_cross_e2)
+            origin_cross_e1 = p1_to_origin.cross(self.e1)
+            v = f * directions.dot(origin_cross_e1)
+            t = f * origin_cross_e1.dot(self.e2)
+
+        hit = (np.abs(det) >= 0.00001) & (u >= 0) & (u <= 1) & (v >= 0) & (u + v <= 1)
+        t[~hit] = np.inf
+        return t[:, None], hit[:, None]
+
+
+def intersect_walls_packet(shape, origins, directions, a, b, disc, walls, t, hit):
+    """
+    Shared by the Cylinder and Cone packet kernels: solves the wall quadratic where `walls` is set and keeps the roots
+    whose y lies strictly between the shape's minimum and maximum, in columns 0 and 1 of t and hit.
+    """
+    root = np.sqrt(np.where(walls, disc, 0))
+    t0 = (-b - root) / (2 * a)
+    t1 = (-b + root) / (2 * a)
+    for column, root_t in enumerate((np.minimum(t0, t1), np.maximum(t0, t1))):
+        y = origins.y + root_t * directions.y
+        hit[:, column] = walls & (shape.minimum < y) & (y < shape.maximum)
+        t[hit[:, column], column] = root_t[hit[:, column]]
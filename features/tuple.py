@@ -1,10 +1,18 @@
+import math
+
 import numpy as np
 
+SCALARS = (int, float, np.integer, np.floating)
+
 
 class Tuple:
     """
     Class for holding points and vectors. Vectors denoted by w = 0, Points denoted by w = 1.
+
+    The in-place (`iadd`, `isub`, `imul`, `iadd_scaled`) and fused (`add_scaled`, `sub_normalize`) variants exist for
+    the shading hot paths; in-place ones must only be used on tuples the caller has just created.
     """
+    __slots__ = ('x', 'y', 'z', 'w')
 
     def __init__(self, x, y, z, w):
         self.x = x
@@ -23,14 +31,16 @@ class Tuple:
         return self.x >= other.x and self.y >= other.y and self.z >= other.z and self.w == other.w
 
     def __add__(self, other):
-        if self.w + other.w in [0, 1]:
-            return self.__class__(self.x + other.x, self.y + other.y, self.z + other.z, self.w + other.w)
+        w = self.w + other.w
+        if w == 0 or w == 1:
+            return self.__class__(self.x + other.x, self.y + other.y, self.z + other.z, w)
         else:
             print("Cannot add two points together!")
 
     def __sub__(self, other):
-        if self.w - other.w in [0, 1]:
-            return self.__class__(self.x - other.x, self.y - other.y, self.z - other.z, self.w - other.w)
+        w = self.w - other.w
+        if w == 0 or w == 1:
+            return self.__class__(self.x - other.x, self.y - other.y, self.z - other.z, w)
         else:
             print("Cannot subtract a point from a vector!")
 
@@ -38,7 +48,7 @@ class Tuple:
         return self.__class__(-self.x, -self.y, -self.z, -self.w)
 
     def __mul__(self, other):
-        if isinstance(other, int) or isinstance(other, float):
+        if isinstance(other, SCALARS):
             return self.__class__(self.x * other, self.y * other, self.z * other, self.w * other)
         else:
             print("Cannot multiply tuple by anything apart from int and float!")
@@ -47,13 +57,66 @@ class Tuple:
         return self.__mul__(other)
 
     def __truediv__(self, other):
-        if isinstance(other, int) or isinstance(other, float):
+        if isinstance(other, SCALARS):
             return self.__class__(self.x / other, self.y / other, self.z / other, self.w / other)
         else:
             print("Cannot divide tuple by anything apart from int and float!")
 
+    def add_scaled(self, other, scale):
+        """
+        Returns self + other * scale with a single allocation.
+        """
+        return self.__class__(self.x + other.x * scale, self.y + other.y * scale, self.z + other.z * scale,
+                              self.w + other.w * scale)
+
+    def sub_normalize(self, other):
+        """
+        Returns (self - other).normalize() as a Vector with a single allocation.
+        """
+        x, y, z, w = self.x - other.x, self.y - other.y, self.z - other.z, self.w - other.w
+        length = math.sqrt(x * x + y * y + z * z + w * w)
+        return Vector(x / length, y / length, z / length, w / length) if length else Vector(0, 0, 0)
+
+    def set_add_scaled(self, base, other, scale):
+        """
+        Overwrites self with base + other * scale, for tuples owned by a reused object such as a pooled Computations.
+        """
+        self.x = base.x + other.x * scale
+        self.y = base.y + other.y * scale
+        self.z = base.z + other.z * scale
+        self.w = base.w + other.w * scale
+        return self
+
+    def iadd(self, other):
+        self.x += other.x
+        self.y += other.y
+        self.z += other.z
+        self.w += other.w
+        return self
+
+    def isub(self, other):
+        self.x -= other.x
+        self.y -= other.y
+        self.z -= other.z
+        self.w -= other.w
+        return self
+
+    def imul(self, other):
+        self.x *= other
+        self.y *= other
+        self.z *= other
+        self.w *= other
+        return self
+
+    def iadd_scaled(self, other, scale):
+        self.x += other.x * scale
+        self.y += other.y * scale
+        self.z += other.z * scale
+        self.w += other.w * scale
+        return self
+
     def magnitude(self):
-        return np.sqrt(self.x ** 2 + self.y ** 2 + self.z ** 2 + self.w ** 2)
+        return math.sqrt(self.x * self.x + self.y * self.y + self.z * self.z + self.w * self.w)
 
     def normalize(self):
         length = self.magnitude()
@@ -68,31 +131,46 @@ class Tuple:
                               self.x * other.y - self.y * other.x, self.w)
 
     def reflect(self, normal):
-        return self - normal * 2 * self.dot(normal)
+        return self.add_scaled(normal, -2 * self.dot(normal))
 
     def __str__(self):
         return f"x: {self.x} , y: {self.y}, z: {self.z}, w: {self.w}"
 
 
 class Point(Tuple):
+    __slots__ = ()
+
     def __init__(self, x, y, z, w=1):
-        super().__init__(x, y, z, w)
+        self.x = x
+        self.y = y
+        self.z = z
+        self.w = w
 
     def __str__(self) -> str:
         return f"P({self.x}, {self.y}, {self.z})"
 
 
 class Vector(Tuple):
+    __slots__ = ()
+
     def __init__(self, x, y, z, w=0):
-        super().__init__(x, y, z, w)
+        self.x = x
+        self.y = y
+        self.z = z
+        self.w = w
 
     def __str__(self):
         return f"V({self.x}, {self.y}, {self.z})"
 
 
 class Color(Tuple):
+    __slots__ = ()
+
     def __init__(self, r, g, b, w=0):
-        super().__init__(r, g, b, w)
+        self.x = r
+        self.y = g
+        self.z = b
+        self.w = w
 
     @property
     def red(self):
@@ -108,12 +186,20 @@ class Color(Tuple):
 
     def __mul__(self, other):
         if isinstance(other, Color):
-            return Color(self.red * other.red, self.green * other.green, self.blue * other.blue)
+            return Color(self.x * other.x, self.y * other.y, self.z * other.z)
         return super().__mul__(other)
 
     def __rmul__(self, other):
         return self.__mul__(other)
 
+    def imul(self, other):
+        if isinstance(other, Color):
+            self.x *= other.x
+            self.y *= other.y
+            self.z *= other.z
+            return self
+        return super().imul(other)
+
     def __str__(self):
         return f"C({self.red}, {self.green}, {self.blue})"
 
@@ -122,3 +208,122 @@ class Color(Tuple):
         g = int(np.ceil(max(min(255, 255 * self.green), 0)))
         b = int(np.ceil(max(min(255, 255 * self.blue), 0)))
         return r, g, b
+
+
+class TupleArray:
+    """
+    N tuples stored as the rows of an N x 4 array of (x, y, z, w), for batched geometry. Operations mirror Tuple and
+    apply row by row; dot and magnitude return arrays of length N. The other operand may be a TupleArray of the same
+    length, a single Tuple (broadcast to every row), a scalar or, for multiplication and division, a length N array.
+    """
+    __slots__ = ('data',)
+
+    def __init__(self, data):
+        self.data = np.ascontiguousarray(data, dtype=float).reshape(-1, 4)
+
+    @staticmethod
+    def points(xyz):
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        return TupleArray(np.column_stack((xyz, np.ones(len(xyz)))))
+
+    @staticmethod
+    def vectors(xyz):
+        xyz = np.asarray(xyz, dtype=float).reshape(-1, 3)
+        return TupleArray(np.column_stack((xyz, np.zeros(len(xyz)))))
+
+    @staticmethod
+    def from_tuples(tuples):
+        return TupleArray([(t.x, t.y, t.z, t.w) for t in tuples])
+
+    @property
+    def x(self):
+        return self.data[:, 0]
+
+    @property
+    def y(self):
+        return self.data[:, 1]
+
+    @property
+    def z(self):
+        return self.data[:, 2]
+
+    @property
+    def w(self):
+        return self.data[:, 3]
+
+    def __len__(self):
+        return len(self.data)
+
+    def __getitem__(self, key):
+        if isinstance(key, SCALARS):
+            return Tuple(*self.data[key].tolist())
+        return TupleArray(self.data[key])
+
+    def __iter__(self):
+        return (Tuple(*row) for row in self.data.tolist())
+
+    def __eq__(self, other):
+        if isinstance(other, TupleArray) and len(other) != len(self):
+            return False
+        other = np.broadcast_to(TupleArray._operand(other), self.data.shape)
+        close = np.all(np.abs(self.data[:, :3] - other[:, :3]) < 0.0001)
+        return bool(close and np.all(self.data[:, 3] == other[:, 3]))
+
+    @staticmethod
+    def _operand(other):
+        if isinstance(other, TupleArray):
+            return other.data
+        if isinstance(other, Tuple):
+            return np.array([other.x, other.y, other.z, other.w], dtype=float)
+        other = np.asarray(other, dtype=float)
+        return other[:, None] if other.ndim == 1 else other
+
+    def __add__(self, other):
+        return TupleArray(self.data + TupleArray._operand(other))
+
+    def __radd__(self, other):
+        return self.__add__(other)
+
+    def __sub__(self, other):
+        return TupleArray(self.data - TupleArray._operand(other))
+
+    def __rsub__(self, other):
+        return TupleArray(TupleArray._operand(other) - self.data)
+
+    def __neg__(self):
+        return TupleArray(-self.data)
+
+    def __mul__(self, other):
+        return TupleArray(self.data * TupleArray._operand(other))
+
+    def __rmul__(self, other):
+        return self.__mul__(other)
+
+    def __truediv__(self, other):
+        return TupleArray(self.data / TupleArray._operand(other))
+
+    def magnitude(self):
+        return np.sqrt(np.einsum('ij,ij->i', self.data, self.data))
+
+    def normalize(self):
+        length = self.magnitude()
+        safe = np.where(length == 0, 1, length)
+        return TupleArray(np.where(length[:, None] == 0, 0, self.data / safe[:, None]))
+
+    def dot(self, other):
+        other = TupleArray._operand(other)
+        return np.einsum('ij,ij->i', self.data, np.broadcast_to(other, self.data.shape))
+
+    def cross(self, other):
+        other = np.broadcast_to(TupleArray._operand(other), self.data.shape)
+        result = np.empty_like(self.data)
+        result[:, :3] = np.cross(self.data[:, :3], other[:, :3])
+        result[:, 3] = self.data[:, 3]
+        return TupleArray(result)
+
+    def reflect(self, normal):
+        normal = np.broadcast_to(TupleArray._operand(normal), self.data.shape)
+        return TupleArray(self.data - normal * (2 * np.einsum('ij,ij->i', self.data, normal))[:, None])
+
+    def __str__(self):
+        return f"TupleArray({len(self)}):\n{self.data}"
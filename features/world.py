@@ -1,18 +1,84 @@
 import numpy as np
 
-from features.intersection import Intersections
+from features.bvh import BVH
+from features.intersection import ComputationsPool, Intersections, IntersectionRecord
 from features.light import Light
 from features.material import Material
-from features.matrix import Scaling
+from features.matrix import Matrix, Scaling
 from features.ray import Ray
-from features.shape import Sphere
+from features.shape import Shape, Sphere
 from features.tuple import Color, Point
 
 
+class SceneObjects(list):
+    """
+    The list of a World's objects; every modification bumps Shape.revision so the World rebuilds its accelerator.
+    """
+    def append(self, obj):
+        super().append(obj)
+        Shape.revision += 1
+
+    def extend(self, iterable):
+        super().extend(iterable)
+        Shape.revision += 1
+
+    def insert(self, index, obj):
+        super().insert(index, obj)
+        Shape.revision += 1
+
+    def remove(self, obj):
+        super().remove(obj)
+        Shape.revision += 1
+
+    def pop(self, index=-1):
+        Shape.revision += 1
+        return super().pop(index)
+
+    def clear(self):
+        super().clear()
+        Shape.revision += 1
+
+    def __setitem__(self, key, value):
+        super().__setitem__(key, value)
+        Shape.revision += 1
+
+    def __delitem__(self, key):
+        super().__delitem__(key)
+        Shape.revision += 1
+
+    def __iadd__(self, other):
+        self.extend(other)
+        return self
+
+
 class World:
     def __init__(self):
         self.light = None
         self.objects = []
+        self.pool = ComputationsPool()
+        self._accelerator = None
+        self._revision = None
+
+    @property
+    def objects(self):
+        return self._objects
+
+    @objects.setter
+    def objects(self, objects):
+        self._objects = SceneObjects(objects)
+        Shape.revision += 1
+
+    def accelerator(self):
+        """
+        Top-level FlatBVH over the world-space bounds of the objects, with unbounded ones such as planes kept aside. It
+        is rebuilt on the next query after objects are added, removed or transformed, including transforms edited in
+        place. The revision counters are global, so a change to a shape in another World also causes a rebuild.
+        """
+        revision = (Shape.revision, Matrix.revision)
+        if self._revision != revision:
+            self._accelerator = BVH(self._objects).flatten()
+            self._revision = revision
+        return self._accelerator
 
     @staticmethod
     def default():
@@ -27,11 +93,25 @@ class World:
 
     def intersect(self, r):
         xs = Intersections()
-        for obj in self.objects:
-            xs.extend(obj.intersect(r))
+        self.accelerator().visit(r, lambda obj: xs.extend(obj.intersect(r)))
         xs.sort()
         return xs
 
+    def intersect_record(self, r, record=None):
+        record = IntersectionRecord() if record is None else record
+        self.accelerator().visit(r, lambda obj: obj.intersect_into(r, record))
+        return record
+
+    def closest_hit(self, r, t_max=float('inf')):
+        """
+        The nearest intersection in (0, t_max), found without collecting every intersection: each object is only asked
+        for hits closer than the best one so far. intersect still returns the full sorted list.
+        """
+        return self.accelerator().closest_hit(r, t_max)
+
+    def any_hit(self, r, t_max):
+        return self.accelerator().any_hit(r, t_max)
+
     def shade_hit(self, comps, remaining=5):
         shadowed = self.is_shadowed(comps.over_point)
 
@@ -43,18 +123,29 @@ class World:
         m = comps.obj.material
         if m.transparency > 0 and m.reflective > 0:
             reflectance = comps.schlick()
-            return surface + reflected * reflectance + refracted * (1 - reflectance)
+            return surface.iadd_scaled(reflected, reflectance).iadd_scaled(refracted, 1 - reflectance)
         else:
-            return surface + reflected + refracted
+            return surface.iadd(reflected).iadd(refracted)
 
     def color_at(self, r, remaining=5):
-        hit = self.intersect(r).hit()
-        return Color(0, 0, 0) if hit is None else self.shade_hit(hit.prepare_computations(r), remaining)
+        hit = self.closest_hit(r)
+        if hit is None:
+            return Color(0, 0, 0)
+
+        xs = None
+        if hit.obj.material.transparency:
+            xs = self.intersect(r)
+            hit = xs.hit()
+        comps = hit.prepare_computations(r, xs, self.pool)
+        color = self.shade_hit(comps, remaining)
+        if self.pool is not None:
+            self.pool.release(comps)
+        return color
 
     def is_shadowed(self, point):
         v = self.light.position - point
-        hit = self.intersect(Ray(point, v.normalize())).hit()
-        return hit and hit.t < v.magnitude()
+        distance = v.magnitude()
+        return self.any_hit(Ray(point, v.normalize()), distance)
 
     def reflected_color(self, comps, remaining=5):
         if not comps.obj.material.reflective or remaining <= 0:
@@ -73,6 +164,6 @@ class World:
             return Color(0, 0, 0)
 
         cos_t = np.sqrt(1 - sin2_t)
-        direction = comps.normal_v * (n_ratio * cos_i - cos_t) - comps.eye_v * n_ratio
+        direction = (comps.normal_v * (n_ratio * cos_i - cos_t)).iadd_scaled(comps.eye_v, -n_ratio)
 
         return self.color_at(Ray(comps.under_point, direction), remaining - 1) * comps.obj.material.transparency
@@ -0,0 +1,184 @@
+import unittest
+
+import numpy as np
+
+from features.bounds import Bounds
+from features.bvh import BVH
+from features.group import Group, Hexagon
+from features.intersection import IntersectionRecord
+from features.matrix import Translation, Scaling, Rotation
+from features.ray import Ray
+from features.shape import Sphere, Plane, Cube, Cone, Triangle
+from features.tuple import Point, Vector, TupleArray
+
+
+def sphere_grid(n):
+    g = Group()
+    for i in range(n):
+        for j in range(n):
+            s = Sphere()
+            s.set_transform(Translation(3 * i, 3 * j, 0))
+            g.add_child(s)
+    return g
+
+
+class TestBVH(unittest.TestCase):
+    def test_leaf_size(self):
+        g = sphere_grid(8)
+        bvh = BVH(g.shapes, leaf_size=4)
+
+        def leaves(node):
+            return [node] if node.shapes is not None else leaves(node.left) + leaves(node.right)
+
+        self.assertTrue(all(len(leaf.shapes) <= 4 for leaf in leaves(bvh.root)))
+        self.assertEqual(sorted(id(s) for leaf in leaves(bvh.root) for s in leaf.shapes), sorted(map(id, g.shapes)))
+        self.assertEqual(bvh.root.box, Bounds(Point(-1, -1, -1), Point(22, 22, 1)))
+        self.assertLessEqual(bvh.depth(), 6)
+
+    def test_sah_separates_clusters(self):
+        g = Group()
+        for x in [0, 0.5, 1, 100, 100.5, 101]:
+            s = Sphere()
+            s.set_transform(Translation(x, 0, 0) * Scaling(0.1, 0.1, 0.1))
+            g.add_child(s)
+        bvh = BVH(g.shapes, leaf_size=3)
+        self.assertEqual(bvh.root.left.shapes, g.shapes[:3])
+        self.assertEqual(bvh.root.right.shapes, g.shapes[3:])
+
+    def test_unbounded_children(self):
+        g = Group()
+        g.add_child(Plane())
+        g.add_child(Sphere())
+        bvh = BVH(g.shapes)
+        self.assertEqual(bvh.unbounded, [g.shapes[0]])
+        self.assertEqual(bvh.root.shapes, [g.shapes[1]])
+
+    def test_divided_group_matches_linear(self):
+        g = Group()
+        rng = np.random.default_rng(1)
+        for i in range(40):
+            shape = [Sphere(), Cube(), Cone(minimum=-1, maximum=0, closed=True),
+                     Triangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0))][i % 4]
+            shape.set_transform(Translation(*rng.uniform(-8, 8, 3)) * Rotation(*rng.uniform(0, np.pi, 3)))
+            g.add_child(shape)
+        g.add_child(Plane())
+        rays = [Ray(Point(*rng.uniform(-10, 10, 3)), Vector(*rng.normal(size=3)).normalize()) for _ in range(200)]
+        linear = [(g.intersect(r), g.closest_hit(r), g.any_hit(r, 5)) for r in rays]
+        g.divide(2)
+        for r, (xs, hit, occluded) in zip(rays, linear):
+            self.assertEqual([(i.t, id(i.obj)) for i in g.intersect(r)], [(i.t, id(i.obj)) for i in xs])
+            divided_hit = g.closest_hit(r)
+            self.assertEqual(hit is None, divided_hit is None)
+            if hit:
+                self.assertEqual((hit.t, hit.obj), (divided_hit.t, divided_hit.obj))
+            self.assertEqual(g.any_hit(r, 5), occluded)
+            record = IntersectionRecord()
+            g.intersect_into(r, record)
+            self.assertEqual(sorted(record.ts), [i.t for i in xs])
+
+    def test_divide_nested_groups(self):
+        h = Hexagon().create()
+        h.set_transform(Rotation(np.pi / 4, 0, 0))
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        expected = [i.t for i in h.intersect(r)]
+        h.divide()
+        self.assertIsNotNone(h.bvh)
+        self.assertTrue(all(side.bvh is not None for side in h.shapes))
+        self.assertEqual([i.t for i in h.intersect(r)], expected)
+
+    def test_add_child_discards_hierarchy(self):
+        g = sphere_grid(2)
+        g.divide()
+        g.add_child(Sphere())
+        self.assertIsNone(g.bvh)
+
+    def test_transform_child_after_divide(self):
+        g = sphere_grid(3)
+        g.divide(leaf_size=2)
+        r = Ray(Point(20, 0, -5), Vector(0, 0, 1))
+        self.assertIsNone(g.closest_hit(r))
+        g.shapes[0].set_transform(Translation(20, 0, 0))
+        self.assertIsNone(g.bvh)
+        self.assertEqual(len(g.intersect(r)), 2)
+        self.assertEqual(g.closest_hit(r).t, 4)
+        self.assertTrue(g.any_hit(r, 10))
+        self.assertIsNotNone(g.bvh)
+
+    def test_add_to_inner_group_after_divide(self):
+        inner = Group()
+        inner.add_child(Sphere())
+        outer = Group()
+        outer.add_child(inner)
+        outer.add_child(Sphere(transform=Translation(-3, 0, 0)))
+        outer.divide()
+        r = Ray(Point(5, 0, -5), Vector(0, 0, 1))
+        self.assertIsNone(outer.closest_hit(r))
+        inner.add_child(Sphere(transform=Translation(5, 0, 0)))
+        self.assertIsNone(outer.bvh)
+        self.assertEqual(outer.closest_hit(r).t, 4)
+        self.assertEqual(len(outer.intersect(r)), 2)
+
+
+class TestFlatBVH(unittest.TestCase):
+    def test_layout(self):
+        g = Group()
+        for x in [0, 0.5, 100, 100.5]:
+            s = Sphere()
+            s.set_transform(Translation(x, 0, 0) * Scaling(0.1, 0.1, 0.1))
+            g.add_child(s)
+        g.add_child(Plane())
+        flat = BVH(g.shapes, leaf_size=2).flatten()
+        self.assertEqual(len(flat), 3)
+        self.assertEqual(flat.unbounded, [g.shapes[4]])
+        self.assertEqual(flat.shapes, g.shapes[:4])
+        np.testing.assert_array_equal(flat.right, [2, -1, -1])
+        np.testing.assert_array_equal(flat.start, [0, 0, 2])
+        np.testing.assert_array_equal(flat.count, [0, 2, 2])
+        np.testing.assert_allclose(flat.minimum[0], [-0.1, -0.1, -0.1])
+        np.testing.assert_allclose(flat.maximum[2], [100.6, 0.1, 0.1])
+        self.assertEqual(flat.entry(0, Ray(Point(-5, 0, 0), Vector(1, 0, 0))), 4.9)
+        self.assertIsNone(flat.entry(1, Ray(Point(-5, 0, 0), Vector(-1, 0, 0)), float('inf')))
+
+    def test_matches_tree(self):
+        rng = np.random.default_rng(2)
+        shapes = []
+        for i in range(60):
+            shape = [Sphere(), Cube(), Triangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0))][i % 3]
+            shape.set_transform(Translation(*rng.uniform(-8, 8, 3)) * Rotation(*rng.uniform(0, np.pi, 3)))
+            shapes.append(shape)
+        tree = BVH(shapes, leaf_size=3)
+        flat = tree.flatten()
+        for _ in range(200):
+            r = Ray(Point(*rng.uniform(-10, 10, 3)), Vector(*rng.normal(size=3)).normalize())
+            tree_hit, flat_hit = tree.closest_hit(r, float('inf')), flat.closest_hit(r, float('inf'))
+            self.assertEqual(tree_hit is None, flat_hit is None)
+            if tree_hit:
+                self.assertEqual((tree_hit.t, tree_hit.obj), (flat_hit.t, flat_hit.obj))
+            self.assertEqual(tree.any_hit(r, 3), flat.any_hit(r, 3))
+            visited, flat_visited = [], []
+            tree.visit(r, visited.append)
+            flat.visit(r, flat_visited.append)
+            self.assertEqual(sorted(map(id, visited)), sorted(map(id, flat_visited)))
+
+    def test_closest_hit_packet(self):
+        rng = np.random.default_rng(3)
+        g = Group()
+        for i in range(50):
+            shape = [Sphere(), Cone(minimum=-1, maximum=0, closed=True), Group()][i % 3]
+            if isinstance(shape, Group):
+                shape.add_child(Cube())
+            shape.set_transform(Translation(*rng.uniform(-8, 8, 3)))
+            g.add_child(shape)
+        g.add_child(Plane())
+        flat = BVH(g.shapes).flatten()
+        origins = TupleArray.points(rng.uniform(-10, 10, (300, 3)))
+        directions = TupleArray.vectors(rng.normal(size=(300, 3))).normalize()
+        t, objects = flat.closest_hit_packet(origins, directions)
+        for i in range(300):
+            hit = flat.closest_hit(Ray(origins[i], directions[i]), float('inf'))
+            if hit is None:
+                self.assertEqual(t[i], float('inf'))
+                self.assertIsNone(objects[i])
+            else:
+                self.assertAlmostEqual(t[i], hit.t, places=9)
+                self.assertIs(objects[i], hit.obj)
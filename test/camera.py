@@ -2,6 +2,7 @@ import unittest
 import numpy as np
 
 from features.camera import Camera
+from features.canvas import Canvas
 from features.matrix import Matrix, Rotation, Translation, view_transform
 from features.tuple import Point, Vector, Color
 from features.world import World
@@ -42,3 +43,186 @@ class TestCamera(unittest.TestCase):
         c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
         image = c.render(w)
         self.assertEqual(image.pixel_at(5, 5), Color(0.38066, 0.47583, 0.2855))
+
+    def test_rays_for_full_image(self):
+        c = Camera(21, 11, np.pi / 2)
+        origins, directions = c.rays_for_tile()
+        self.assertEqual(len(origins), 21 * 11)
+        self.assertTrue(directions.data.flags['C_CONTIGUOUS'])
+        self.assertEqual(origins[0], Point(0, 0, 0))
+        self.assertEqual(directions[5 * 21 + 10], Vector(0, 0, -1))
+
+    def test_rays_for_tile_match_ray_for_pixel(self):
+        c = Camera(201, 101, np.pi / 2, Rotation(0, np.pi / 4, 0) * Translation(0, -2, 5))
+        origins, directions = c.rays_for_tile(90, 40, 16, 8)
+        self.assertEqual(len(directions), 16 * 8)
+        for i in range(len(directions)):
+            r = c.ray_for_pixel(90 + i % 16, 40 + i // 16)
+            self.assertEqual(origins.data[i].tolist(), [r.origin.x, r.origin.y, r.origin.z, r.origin.w])
+            self.assertEqual(directions.data[i].tolist(), [r.direction.x, r.direction.y, r.direction.z, r.direction.w])
+
+    def test_tiles_cover_image(self):
+        tiles = Camera(10, 7, np.pi / 2).tiles(4)
+        self.assertEqual(tiles[0], (0, 0, 4, 4))
+        self.assertEqual(tiles[-1], (8, 4, 2, 3))
+        self.assertEqual(sum(w * h for _, _, w, h in tiles), 70)
+
+    def test_parallel_render_matches_serial(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        self.assertEqual(c.render(w, workers=2, tile_size=4).to_ppm(), c.render(w).to_ppm())
+
+    def test_progressive_render_converges(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        passes = [image.to_ppm() for image in c.render_progressive(w, step=4)]
+        self.assertEqual(len(passes), 3)
+        self.assertEqual(passes[-1], c.render(w).to_ppm())
+
+    def test_progressive_render_odd_step(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        passes = [image.to_ppm() for image in c.render_progressive(w, step=5)]
+        self.assertEqual(len(passes), 3)
+        self.assertEqual(passes[-1], c.render(w).to_ppm())
+
+    def test_progressive_render_bad_step(self):
+        c = Camera(11, 11, np.pi / 2)
+        for step in (0, -2, 1.5):
+            with self.assertRaises(ValueError):
+                c.render_progressive(World.default(), step=step)
+
+    def test_progressive_render_upsamples(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        coarse = next(c.render_progressive(w, step=4))
+        self.assertEqual(coarse.pixel_at(5, 5), coarse.pixel_at(4, 4))
+        self.assertEqual(coarse.pixel_at(4, 4), w.color_at(c.ray_for_pixel(4, 4)))
+        self.assertEqual(coarse.pixel_at(10, 10), w.color_at(c.ray_for_pixel(8, 8)))
+
+    def test_sub_pixel_ray(self):
+        c = Camera(201, 101, np.pi / 2)
+        self.assertEqual(c.ray_for_pixel(100, 50, 0.5, 0.5).direction, c.ray_for_pixel(100, 50).direction)
+        self.assertEqual(c.ray_for_pixel(99, 49, 1.5, 1.5).direction, Vector(0, 0, -1))
+
+    def test_edge_pixels(self):
+        image = Canvas(4, 3)
+        image.write_pixel(1, 1, Color(1, 1, 1))
+        self.assertEqual(Camera.edge_pixels(image, 0.1), [(1, 0), (0, 1), (1, 1), (2, 1), (1, 2)])
+        self.assertEqual(Camera.edge_pixels(image, 1), [])
+
+    def test_adaptive_antialiasing(self):
+        class CountingWorld(World):
+            rays = 0
+
+            def color_at(self, r, remaining=5):
+                self.rays += 1
+                return super().color_at(r, remaining)
+
+        w = CountingWorld()
+        w.light, w.objects = World.default().light, World.default().objects
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        aliased = c.render(w)
+        w.rays = 0
+        image = c.render(w, aa_threshold=0.1, aa_samples=4)
+        edges = Camera.edge_pixels(aliased, 0.1)
+        self.assertTrue(0 < len(edges) < 121)
+        self.assertEqual(w.rays, 121 + 4 * len(edges))
+        for y in range(11):
+            for x in range(11):
+                if (x, y) not in edges:
+                    self.assertEqual(image.pixel_at(x, y), aliased.pixel_at(x, y))
+        x, y = edges[0]
+        self.assertEqual(image.pixel_at(x, y), c.supersample(w, x, y, 4, 0.1, aliased.pixel_at(x, y)))
+        self.assertEqual(c.render(w, workers=2, tile_size=4, aa_threshold=0.1, aa_samples=4).to_ppm(), image.to_ppm())
+
+    def test_supersample_rounds(self):
+        class CountingWorld(World):
+            rays = 0
+
+            def color_at(self, r, remaining=5):
+                self.rays += 1
+                return super().color_at(r, remaining)
+
+        w = CountingWorld()
+        w.light, w.objects = World.default().light, World.default().objects
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        x, y = Camera.edge_pixels(c.render(w), 0.1)[0]
+        w.rays = 0
+        c.supersample(w, x, y, 10)
+        self.assertEqual(w.rays, 11)
+        w.rays = 0
+        c.supersample(w, x, y, 10, threshold=10)
+        self.assertEqual(w.rays, 5)
+        primary = w.color_at(c.ray_for_pixel(x, y))
+        w.rays = 0
+        self.assertEqual(c.supersample(w, x, y, 0, primary=primary), primary)
+        self.assertEqual(w.rays, 0)
+        background = Color(0.5, 0.25, 1)
+        self.assertEqual(c.supersample(World(), 0, 0, 8, primary=background), background / 9)
+
+    def test_tiles_of_region(self):
+        tiles = Camera(100, 50, np.pi / 2).tiles(4, (10, 20, 6, 5))
+        self.assertEqual(tiles, [(10, 20, 4, 4), (14, 20, 2, 4), (10, 24, 4, 1), (14, 24, 2, 1)])
+
+    def test_render_cropped_region(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        full = c.render(w)
+        crop = c.render(w, region=(3, 4, 5, 2))
+        self.assertEqual((crop.width, crop.height), (5, 2))
+        for y in range(2):
+            for x in range(5):
+                self.assertEqual(crop.pixel_at(x, y), full.pixel_at(x + 3, y + 4))
+
+    def test_render_regions_into_canvas(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        full = c.render(w)
+        image = Canvas(11, 11, Color(1, 0, 1))
+        self.assertIs(c.render(w, region=[(0, 0, 2, 2), (5, 5, 3, 1)], canvas=image), image)
+        self.assertEqual(image.pixel_at(1, 1), full.pixel_at(1, 1))
+        self.assertEqual(image.pixel_at(7, 5), full.pixel_at(7, 5))
+        self.assertEqual(image.pixel_at(2, 2), Color(1, 0, 1))
+        self.assertEqual(image.pixel_at(5, 6), Color(1, 0, 1))
+        partial = c.render(w, region=[(5, 5, 3, 1)], workers=2, tile_size=2)
+        self.assertEqual((partial.width, partial.height), (11, 11))
+        self.assertEqual(partial.pixel_at(6, 5), full.pixel_at(6, 5))
+        self.assertEqual(partial.pixel_at(0, 0), Color(0, 0, 0))
+
+    def test_render_region_outside_frame(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        for region in [(8, 0, 5, 2), [(0, 10, 2, 2)], [(0, 0, 2, 2), (-1, 0, 2, 2)], (0, 0, 0, 3)]:
+            with self.assertRaises(ValueError):
+                c.render(w, region=region)
+        with self.assertRaises(ValueError):
+            c.render(w, region=[])
+
+    def test_render_into_canvas_of_wrong_size(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        for image in (Canvas(5, 11), Canvas(11, 12)):
+            with self.assertRaises(ValueError):
+                c.render(w, canvas=image)
+            with self.assertRaises(ValueError):
+                c.render(w, region=[(0, 0, 2, 2)], canvas=image)
+            self.assertTrue(all(len(row) == image.width for row in image.grid))
+
+    def test_render_region_antialiased(self):
+        w = World.default()
+        c = Camera(11, 11, np.pi / 2)
+        c.transform = view_transform(Point(0, 0, -5), Point(0, 0, 0), Vector(0, 1, 0))
+        full = c.render(w, aa_threshold=0.1, aa_samples=4)
+        crop = c.render(w, aa_threshold=0.1, aa_samples=4, region=(0, 0, 11, 6))
+        for y in range(5):
+            for x in range(11):
+                self.assertEqual(crop.pixel_at(x, y), full.pixel_at(x, y))
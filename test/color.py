@@ -30,3 +30,9 @@ class TestColor(unittest.TestCase):
         c2 = Color(0.9, 1, 0.1)
         self.assertEqual(c1 * c2, Color(0.9, 0.2, 0.04))
         self.assertEqual(c2 * c1, Color(0.9, 0.2, 0.04))
+
+    def test_in_place_multiply_colors(self):
+        c = Color(1, 0.2, 0.4)
+        self.assertIs(c.imul(Color(0.9, 1, 0.1)), c)
+        self.assertEqual(c, Color(0.9, 0.2, 0.04))
+        self.assertEqual(c.imul(2), Color(1.8, 0.4, 0.08))
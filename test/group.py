@@ -4,10 +4,11 @@ import numpy as np
 
 from features.bounds import Bounds
 from features.group import Group
+from features.intersection import IntersectionRecord
 from features.matrix import Matrix, Translation, Scaling, Rotation
 from features.ray import Ray
-from features.shape import Test, Sphere, Cylinder
-from features.tuple import Vector, Point
+from features.shape import Test, Sphere, Cylinder, Plane, Cube, Cone, Triangle
+from features.tuple import Vector, Point, TupleArray
 
 
 class TestGroup(unittest.TestCase):
@@ -43,6 +44,35 @@ class TestGroup(unittest.TestCase):
         self.assertEqual(xs[2].obj, s1)
         self.assertEqual(xs[3].obj, s1)
 
+        record = IntersectionRecord()
+        g.intersect_into(Ray(Point(0, 0, -5), Vector(0, 0, 1)), record)
+        self.assertEqual(record.intersections(), xs)
+
+    def test_any_hit(self):
+        g = Group()
+        g.set_transform(Scaling(2, 2, 2))
+        s = Sphere()
+        s.set_transform(Translation(5, 0, 0))
+        g.add_child(s)
+        r = Ray(Point(10, 0, -10), Vector(0, 0, 1))
+        self.assertTrue(g.any_hit(r, 9))
+        self.assertFalse(g.any_hit(r, 8))
+        self.assertFalse(g.any_hit(Ray(Point(0, 0, -10), Vector(0, 0, 1)), 100))
+
+    def test_closest_hit(self):
+        g = Group()
+        s1 = Sphere()
+        s2 = Sphere()
+        s2.set_transform(Translation(0, 0, -3))
+        g.add_child(s1)
+        g.add_child(s2)
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        hit = g.closest_hit(r)
+        self.assertEqual(hit.t, 1)
+        self.assertIs(hit.obj, s2)
+        self.assertEqual(g.closest_hit(Ray(Point(0, 0, -2.5), Vector(0, 0, 1))).t, 0.5)
+        self.assertIsNone(g.closest_hit(r, 1))
+
     def test_transform(self):
         g = Group()
         g.set_transform(Scaling(2, 2, 2))
@@ -93,3 +123,112 @@ class TestGroup(unittest.TestCase):
         self.assertEqual(g.box, Bounds(Point(-1, -1, -1), Point(1, 2, 1)))
         g.set_transform(Scaling(2, 10, 2))
         self.assertEqual(g.box, Bounds(Point(-2, -10, -2), Point(2, 20, 2)))
+
+    def test_bounds_intersect_t_max(self):
+        box = Bounds(Point(-1, -1, -1), Point(1, 1, 1))
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertEqual(len(box.intersect(r)), 2)
+        self.assertEqual(len(box.intersect(r, 4.5)), 2)
+        self.assertEqual(len(box.intersect(r, 4)), 0)
+        self.assertEqual(len(box.intersect(Ray(Point(0, 0, 5), Vector(0, 0, 1)))), 2)
+        self.assertEqual(len(box.intersect(Ray(Point(0, 0, 5), Vector(0, 0, 1)), 100)), 0)
+
+    def test_bounds_with_unbounded_child(self):
+        g = Group()
+        g.add_child(Group())
+        g.add_child(Sphere())
+        self.assertEqual(g.box, Bounds(Point(-1, -1, -1), Point(1, 1, 1)))
+        g.add_child(Plane())
+        self.assertEqual((g.box.minimum.y, g.box.maximum.y), (-float('inf'), float('inf')))
+        r = Ray(Point(0, 5, 5), Vector(0, -1, 0))
+        self.assertEqual(g.closest_hit(r).obj, g.shapes[2])
+
+    def test_bounds_of_all_primitives(self):
+        g = Group()
+        g.add_child(Cube())
+        g.add_child(Triangle(Point(0, 3, 0), Point(-1, 0, 0), Point(1, 0, 0)))
+        self.assertEqual(g.box, Bounds(Point(-1, -1, -1), Point(1, 3, 1)))
+        g.add_child(Cone(minimum=-2, maximum=1))
+        self.assertEqual(g.box, Bounds(Point(-2, -2, -2), Point(2, 3, 2)))
+
+    def test_bounds_hit(self):
+        box = Bounds(Point(-1, -1, -1), Point(1, 1, 1))
+        self.assertEqual(box.hit(Ray(Point(0, 0, -5), Vector(0, 0, 1))), (True, 4, 6))
+        self.assertEqual(box.hit(Ray(Point(0, 0, -5), Vector(0, 0, 1)), 4)[0], False)
+        self.assertEqual(box.hit(Ray(Point(0, 0, 5), Vector(0, 0, 1))), (True, -6, -4))
+        self.assertEqual(box.hit(Ray(Point(0, 0, 5), Vector(0, 0, 1)), 100)[0], False)
+        self.assertEqual(box.hit(Ray(Point(0, 2, -5), Vector(0, 0, 1)))[0], False)
+        self.assertEqual(box.hit(Ray(Point(-2, 0, 0), Vector(2, 4, 6).normalize()))[0], False)
+        self.assertEqual(box.hit(Ray(Point(0.5, 0, 0), Vector(0, 0, 1)))[1:], (-1, 1))
+
+    def test_bounds_hit_packet(self):
+        box = Bounds(Point(-1, -1, -1), Point(1, 1, 1))
+        rng = np.random.default_rng(4)
+        origins = TupleArray.points(rng.uniform(-3, 3, (200, 3)))
+        directions = TupleArray.vectors(rng.normal(size=(200, 3))).normalize()
+        hit, entry, exit = box.hit_packet(origins, directions, 2)
+        for i in range(200):
+            expected = box.hit(Ray(origins[i], directions[i]), 2)
+            self.assertEqual(hit[i], expected[0])
+            self.assertAlmostEqual(entry[i], expected[1])
+            self.assertAlmostEqual(exit[i], expected[2])
+
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        minimum = np.array([[-1, -1, -1], [2, 2, 2], [-1, -1, 10]])
+        hit, entry, exit = Bounds.hit_boxes(r, minimum, minimum + 2)
+        np.testing.assert_array_equal(hit, [True, False, True])
+        np.testing.assert_array_equal(entry[hit], [4, 15])
+        np.testing.assert_array_equal(Bounds.hit_boxes(r, minimum, minimum + 2, 10)[0], [True, False, False])
+
+    def test_bounds_marked_dirty(self):
+        outer = Group()
+        inner = Group()
+        outer.add_child(inner)
+        s = Sphere()
+        inner.add_child(s)
+        self.assertIsNone(outer._local_box)
+        self.assertEqual(outer.local_bounds(), Bounds(Point(-1, -1, -1), Point(1, 1, 1)))
+
+        s.set_transform(Translation(5, 0, 0))
+        self.assertIsNone(inner._local_box)
+        self.assertIsNone(outer._local_box)
+        self.assertEqual(outer.local_bounds(), Bounds(Point(4, -1, -1), Point(6, 1, 1)))
+        self.assertEqual(inner._local_box, Bounds(Point(4, -1, -1), Point(6, 1, 1)))
+
+        inner.add_child(Sphere())
+        self.assertIsNotNone(inner._local_box)
+        self.assertEqual(outer.local_bounds(), Bounds(Point(-1, -1, -1), Point(6, 1, 1)))
+
+    def test_intersect_after_transforming_filled_group(self):
+        g = Group()
+        s = Sphere()
+        s.set_transform(Translation(5, 0, 0))
+        g.add_child(s)
+        g.set_transform(Scaling(2, 2, 2))
+        self.assertEqual(g.box, Bounds(Point(8, -2, -2), Point(12, 2, 2)))
+        self.assertEqual(g.intersect(Ray(Point(10, 0, -10), Vector(0, 0, 1))).count, 2)
+        self.assertEqual(g.closest_hit(Ray(Point(10, 0, -10), Vector(0, 0, 1))).t, 8)
+
+    def test_hits_follow_transform_changes(self):
+        for divided in (False, True):
+            outer = Group()
+            inner = Group()
+            outer.add_child(inner)
+            s = Sphere()
+            inner.add_child(s)
+            if divided:
+                outer.divide()
+            r = Ray(Point(5, 0, -5), Vector(0, 0, 1))
+            self.assertIsNone(outer.closest_hit(r))
+
+            s.transform = Translation(5, 0, 0)
+            self.assertEqual(outer.closest_hit(r).t, 4)
+            self.assertTrue(outer.any_hit(r, 10))
+            self.assertEqual(outer.intersect(r).count, 2)
+            record = IntersectionRecord()
+            outer.intersect_into(r, record)
+            self.assertEqual(sorted(record.ts), [4, 6])
+
+            inner.set_transform(Translation(0, 5, 0))
+            self.assertIsNone(outer.closest_hit(r))
+            self.assertEqual(outer.closest_hit(Ray(Point(5, 5, -5), Vector(0, 0, 1))).t, 4)
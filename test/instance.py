@@ -0,0 +1,131 @@
+import pickle
+import unittest
+
+import numpy as np
+
+from features.group import Group, Hexagon
+from features.instance import Instance, InstanceProxy
+from features.light import Light
+from features.material import Material
+from features.matrix import Translation, Scaling, Rotation
+from features.mesh import Mesh
+from features.ray import Ray
+from features.shape import Sphere
+from features.tuple import Point, Vector, Color
+from features.world import World
+
+
+class TestInstance(unittest.TestCase):
+    def test_matches_transformed_copy(self):
+        transform = Translation(1, 0.5, 0) * Rotation(0.4, 0.3, 0) * Scaling(1, 2, 1)
+        copy = Hexagon(transform=transform).create()
+        geometry = Hexagon().create()
+        geometry.divide()
+        instance = Instance(geometry, transform)
+
+        rng = np.random.default_rng(4)
+        for _ in range(200):
+            r = Ray(Point(*rng.uniform(-3, 3, 3)), Vector(*rng.normal(size=3)).normalize())
+            expected, xs = copy.intersect(r), instance.intersect(r)
+            np.testing.assert_allclose([i.t for i in xs], [i.t for i in expected])
+            for i, j in zip(xs, expected):
+                self.assertIsInstance(i.obj, InstanceProxy)
+                self.assertEqual(i.obj.normal_at(r.position(i.t)), j.obj.normal_at(r.position(j.t)))
+            self.assertEqual(instance.any_hit(r, 2), copy.any_hit(r, 2))
+            hit = instance.closest_hit(r)
+            self.assertEqual(hit is None, expected.hit() is None)
+            if hit:
+                self.assertAlmostEqual(hit.t, expected.hit().t)
+
+    def test_geometry_is_not_modified(self):
+        geometry = Sphere(material=Material(color=Color(1, 0, 0)))
+        g = Group(material=Material(color=Color(0, 1, 0)))
+        a = Instance(geometry, Translation(-2, 0, 0))
+        b = Instance(geometry, Translation(2, 0, 0), Material(color=Color(0, 0, 1)))
+        g.add_child(a)
+        g.add_child(Instance(geometry))
+        self.assertIsNone(geometry.parent)
+        self.assertEqual(geometry.material.color, Color(1, 0, 0))
+        self.assertIs(a.parent, g)
+        self.assertEqual(a.material.color, Color(0, 1, 0))
+        self.assertEqual(b.material.color, Color(0, 0, 1))
+        self.assertEqual(Instance(geometry).material.color, Color(1, 0, 0))
+
+        hit = b.closest_hit(Ray(Point(2, 0, -5), Vector(0, 0, 1)))
+        self.assertEqual(hit.t, 4)
+        self.assertIs(hit.obj.shape, geometry)
+        self.assertEqual(hit.obj.material.color, Color(0, 0, 1))
+        self.assertEqual(hit.obj.normal_at(Point(2, 0, -1)), Vector(0, 0, -1))
+
+    def test_geometry_in_group_rejected(self):
+        g = Group()
+        s = Sphere()
+        g.add_child(s)
+        with self.assertRaises(Exception):
+            Instance(s)
+
+    def test_bounds(self):
+        instance = Instance(Sphere(transform=Scaling(2, 1, 1)), Translation(5, 0, 0))
+        g = Group()
+        g.add_child(instance)
+        self.assertEqual((instance.box.minimum, instance.box.maximum), (Point(-2, -1, -1), Point(2, 1, 1)))
+        self.assertEqual((g.box.minimum, g.box.maximum), (Point(3, -1, -1), Point(7, 1, 1)))
+
+    def test_nested_normals(self):
+        g = Group(transform=Rotation(0, np.pi / 2, 0))
+        instance = Instance(Sphere(transform=Scaling(1, 2, 3)), Scaling(1, 2, 3))
+        g.add_child(instance)
+        s = Sphere(transform=Scaling(1, 2, 3))
+        expected = Group(transform=Rotation(0, np.pi / 2, 0))
+        inner = Group(transform=Scaling(1, 2, 3))
+        expected.add_child(inner)
+        inner.add_child(s)
+        point = Point(1.7321, 1.1547, -5.5774)
+        self.assertEqual(instance.intersect(Ray(Point(0, 0, -20), Vector(0, 0, 1)))[0].obj.normal_at(point),
+                         s.normal_at(point))
+
+    def test_refraction_through_two_instances(self):
+        glass = Sphere.glassy()
+        a = Instance(glass, Translation(0, 0, -0.5))
+        b = Instance(glass, Translation(0, 0, 0.5), Material(transparency=1, refractive_index=2))
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        xs = a.intersect(r)
+        xs.extend(b.intersect(r))
+        xs.sort()
+        self.assertIs(xs[0].obj.solid, xs[2].obj.solid)
+        self.assertIsNot(xs[0].obj.solid, xs[1].obj.solid)
+        self.assertEqual([i.refractive_indices(xs) for i in xs], [(1, 1.5), (1.5, 2), (2, 2), (2, 1)])
+
+    def test_shared_mesh_in_world(self):
+        mesh = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0]], [[0, 1, 2]])
+        w = World()
+        w.light = Light(Point(-10, 10, -10), Color(1, 1, 1))
+        w.objects = [Instance(mesh, Translation(x, 0, 0)) for x in range(-20, 21, 4)]
+        copy = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0]], [[0, 1, 2]], transform=Translation(8, 0, 0))
+        r = Ray(Point(8, 0.5, -5), Vector(0, 0, 1))
+        self.assertEqual(w.closest_hit(r).t, 5)
+        color = w.color_at(r)
+        w.objects = [copy]
+        self.assertEqual(color, w.color_at(r))
+
+    def test_proxy_transform_cached(self):
+        instance = Instance(Sphere(transform=Scaling(2, 2, 2)), Translation(5, 0, 0))
+        r = Ray(Point(5, 0, -5), Vector(0, 0, 1))
+        first, second = (i.obj for i in instance.intersect(r))
+        self.assertIs(first.transform, second.transform)
+        self.assertEqual(first.transform, Translation(5, 0, 0) * Scaling(2, 2, 2))
+        self.assertIs(first.transform.inverse(), second.transform.inverse())
+
+        instance.set_transform(Translation(0, 5, 0))
+        self.assertEqual(first.transform, Translation(0, 5, 0) * Scaling(2, 2, 2))
+        instance.geometry.transform[0, 0] = 3
+        self.assertEqual(first.transform * Point(1, 1, 1), Point(3, 7, 2))
+
+    def test_pickle_drops_solids(self):
+        instance = Instance(Sphere.glassy())
+        instance.intersect(Ray(Point(0, 0, -5), Vector(0, 0, 1)))[0].obj.solid
+        self.assertEqual(len(instance.solids), 1)
+        copy = pickle.loads(pickle.dumps(instance))
+        self.assertEqual(copy.solids, {})
+        self.assertEqual(copy.transforms, {})
+        self.assertEqual(copy.intersect(Ray(Point(0, 0, -5), Vector(0, 0, 1)))[0].t, 4)
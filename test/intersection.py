@@ -1,6 +1,6 @@
 import unittest
 
-from features.intersection import Intersection, Intersections
+from features.intersection import Intersection, Intersections, IntersectionRecord, ComputationsPool
 from features.matrix import Translation, Scaling
 from features.ray import Ray
 from features.shape import Sphere, Plane
@@ -40,6 +40,52 @@ class TestIntersection(unittest.TestCase):
         i4 = Intersection(2, s)
         self.assertEqual(Intersections(i1, i2, i3, i4).hit(), i4)
 
+    def test_record_hit(self):
+        s1, s2 = Sphere(), Sphere()
+        record = IntersectionRecord()
+        self.assertIsNone(record.hit())
+        for t, obj in [(5, s1), (-3, s2), (2, s2), (2, s1), (7, s1)]:
+            record.add(t, obj)
+        self.assertEqual(len(record), 5)
+        self.assertEqual(record.hit_index(), 2)
+        hit = record.hit()
+        self.assertEqual(hit.t, 2)
+        self.assertIs(hit.obj, s2)
+        self.assertEqual([i.t for i in record.intersections()], [-3, 2, 2, 5, 7])
+        record.clear()
+        self.assertEqual(len(record), 0)
+
+    def test_record_all_neg(self):
+        record = IntersectionRecord()
+        record.extend(Intersections(Intersection(-1, Sphere()), Intersection(-2, Sphere())))
+        self.assertIsNone(record.hit())
+
+    def test_compact_layout(self):
+        i = Intersection(4, Sphere())
+        comps = i.prepare_computations(Ray(Point(0, 0, -5), Vector(0, 0, 1)))
+        for obj in (i, comps, Ray(Point(0, 0, 0), Vector(0, 0, 1))):
+            self.assertFalse(hasattr(obj, '__dict__'))
+
+    def test_computations_pool(self):
+        pool = ComputationsPool()
+        s = Sphere()
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        comps = Intersection(4, s).prepare_computations(r, pool=pool)
+        point, over_point, reflect_v = comps.point, comps.over_point, comps.reflect_v
+        pool.release(comps)
+        reused = Intersection(6, s).prepare_computations(r, pool=pool)
+        self.assertIs(reused, comps)
+        self.assertIs(reused.point, point)
+        self.assertIs(reused.over_point, over_point)
+        self.assertIs(reused.reflect_v, reflect_v)
+        fresh = Intersection(6, s).prepare_computations(r)
+        for name in ('point', 'eye_v', 'normal_v', 'over_point', 'under_point', 'reflect_v'):
+            self.assertEqual(getattr(reused, name), getattr(fresh, name))
+        self.assertEqual(reused.t, 6)
+        self.assertEqual(reused.point, Point(0, 0, 1))
+        self.assertEqual(reused.normal_v, Vector(0, 0, -1))
+        self.assertTrue(reused.inside)
+
     def test_precomputing(self):
         comps = Intersection(4, Sphere()).prepare_computations(Ray(Point(0, 0, -5), Vector(0, 0, 1)))
         self.assertEqual(comps.t, 4)
@@ -96,6 +142,19 @@ class TestIntersection(unittest.TestCase):
         self.assertEqual(xs[5].n1, 1.5)
         self.assertEqual(xs[5].n2, 1.0)
 
+    def test_refractive_indices_by_identity(self):
+        a, b = Sphere.glassy(), Sphere.glassy()
+        b.material.refractive_index = 2
+        self.assertEqual(a, b)
+        xs = Intersections(Intersection(1, a), Intersection(2, b), Intersection(3, a), Intersection(4, b))
+        self.assertEqual([i.refractive_indices(xs) for i in xs], [(1, 1.5), (1.5, 2), (2, 2), (2, 1)])
+
+    def test_refractive_indices_opaque(self):
+        s = Sphere()
+        xs = Intersections(Intersection(4, s), Intersection(6, s))
+        comps = xs[0].prepare_computations(Ray(Point(0, 0, -5), Vector(0, 0, 1)), xs)
+        self.assertEqual((comps.n1, comps.n2), (1, 1))
+
     def test_hit_under_offset(self):
         s = Sphere.glassy()
         s.set_transform(Translation(0, 0, 1))
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 
 from features.matrix import Matrix
 from features.tuple import Tuple
@@ -118,4 +119,28 @@ class TestMatrix(unittest.TestCase):
         a = Matrix([[3, -9, 7, 3], [3, -8, 2, -9], [-4, 4, 4, 1], [-6, 5, -1, 1]])
         b = Matrix([[8, 2, 2, 2], [3, -1, 7, 0], [7, 0, 5, 4], [6, -2, 0, 5]])
         c = a * b
-        self.assertEqual(c * b.inverse(), a)
\ No newline at end of file
+        self.assertEqual(c * b.inverse(), a)
+
+    def test_inverse_cached(self):
+        a = Matrix([[-5, 2, 6, -8], [1, -5, 1, 8], [7, 7, -6, -7], [1, -3, 7, 4]])
+        self.assertIs(a.inverse(), a.inverse())
+        self.assertIs(a.inverse_transpose(), a.inverse_transpose())
+        self.assertEqual(a.inverse_transpose(), a.inverse().transpose())
+
+    def test_cached_inverse_read_only(self):
+        a = Matrix([[8, 2, 2, 2], [3, -1, 7, 0], [7, 0, 5, 4], [6, -2, 0, 5]])
+        expected = Matrix(np.linalg.inv(a.matrix))
+        with self.assertRaises(ValueError):
+            a.inverse()[0, 0] = 10
+        with self.assertRaises(ValueError):
+            a.inverse_transpose()[0, 0] = 10
+        self.assertEqual(a.inverse(), expected)
+        self.assertEqual(a.inverse_transpose(), expected.transpose())
+
+    def test_inverse_invalidated(self):
+        a = Matrix([[8, 2, 2, 2], [3, -1, 7, 0], [7, 0, 5, 4], [6, -2, 0, 5]])
+        stale = a.inverse()
+        a[0, 0] = 3
+        self.assertIsNot(a.inverse(), stale)
+        self.assertEqual(a * a.inverse(), Matrix.identity(4))
+        self.assertEqual(a.inverse_transpose(), a.inverse().transpose())
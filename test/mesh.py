@@ -0,0 +1,106 @@
+import unittest
+
+import numpy as np
+
+from features.group import Group
+from features.intersection import Intersections
+from features.light import Light
+from features.matrix import Translation, Scaling, Rotation
+from features.mesh import Mesh, MeshFace
+from features.ray import Ray
+from features.shape import Triangle, Sphere
+from features.tuple import Point, Vector, Color
+from features.world import World
+
+
+def random_mesh(count, seed):
+    rng = np.random.default_rng(seed)
+    centres = rng.uniform(-5, 5, (count, 1, 3))
+    vertices = (centres + rng.uniform(-1, 1, (count, 3, 3))).reshape(-1, 3)
+    return vertices, np.arange(3 * count).reshape(-1, 3)
+
+
+class TestMesh(unittest.TestCase):
+    def test_arrays(self):
+        m = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0]], [[0, 1, 2]])
+        t = Triangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0))
+        np.testing.assert_array_equal(m.p1, [[0, 1, 0]])
+        np.testing.assert_array_equal(m.e1, [[-1, -1, 0]])
+        np.testing.assert_array_equal(m.e2, [[1, -1, 0]])
+        self.assertEqual(m.normal(0, 0, 0), t.normal)
+        m.bounds()
+        self.assertEqual((m.box.minimum, m.box.maximum), (Point(-1, 0, 0), Point(1, 1, 0)))
+
+    def test_intersect(self):
+        m = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0]], [[0, 1, 2]])
+        xs = m.intersect(Ray(Point(0, 0.5, -2), Vector(0, 0, 1)))
+        self.assertEqual(len(xs), 1)
+        self.assertEqual(xs[0].t, 2)
+        self.assertIsInstance(xs[0].obj, MeshFace)
+        self.assertIs(xs[0].obj.solid, m)
+        self.assertEqual(m.intersect(Ray(Point(1, 1, -2), Vector(0, 0, 1))), [])
+        self.assertEqual(m.intersect(Ray(Point(0, -1, -2), Vector(0, 1, 0))), [])
+
+    def test_matches_triangles(self):
+        vertices, faces = random_mesh(300, 1)
+        transform = Translation(1, 0, 0) * Rotation(0.3, 0.2, 0.1) * Scaling(1, 2, 1)
+        m = Mesh(vertices, faces, leaf_size=4)
+        m.set_transform(transform)
+        g = Group()
+        g.set_transform(transform)
+        for a, b, c in vertices[faces].tolist():
+            g.add_child(Triangle(Point(*a), Point(*b), Point(*c)))
+
+        rng = np.random.default_rng(2)
+        for _ in range(200):
+            r = Ray(Point(*rng.uniform(-8, 8, 3)), Vector(*rng.normal(size=3)).normalize())
+            expected = g.intersect(r)
+            xs = m.intersect(r)
+            np.testing.assert_allclose([i.t for i in xs], [i.t for i in expected])
+            for i, j in zip(xs, expected):
+                self.assertEqual(i.obj.normal_at(r.position(i.t)), j.obj.normal_at(r.position(j.t)))
+            hit = m.closest_hit(r)
+            self.assertEqual(hit is None, expected.hit() is None)
+            if hit:
+                self.assertAlmostEqual(hit.t, expected.hit().t)
+            self.assertEqual(m.any_hit(r, 3), g.any_hit(r, 3))
+
+    def test_smooth_normals(self):
+        normals = [[[0, 1, 0], [-1, 0, 0], [1, 0, 0]]]
+        m = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0]], [[0, 1, 2]], normals=normals)
+        self.assertEqual(m.normal(0, 0.45, 0.25), Vector(-0.2, 0.3, 0))
+        hit = m.closest_hit(Ray(Point(-0.2, 0.3, -2), Vector(0, 0, 1)))
+        self.assertAlmostEqual(hit.obj.u, 0.45)
+        self.assertAlmostEqual(hit.obj.v, 0.25)
+        self.assertEqual(hit.obj.normal_at(Point(-0.2, 0.3, 0)), Vector(-0.554700, 0.832050, 0))
+
+    def test_shading(self):
+        w = World()
+        w.light = Light(Point(-10, 10, -10), Color(1, 1, 1))
+        m = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0]], [[0, 1, 2]], transform=Translation(0, 0, 1))
+        t = Triangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0), transform=Translation(0, 0, 1))
+        r = Ray(Point(0, 0.5, -2), Vector(0, 0, 1))
+        w.objects = [m]
+        color = w.color_at(r)
+        w.objects = [t]
+        self.assertEqual(color, w.color_at(r))
+        self.assertNotEqual(color, Color(0, 0, 0))
+
+    def test_refraction_treats_mesh_as_one_object(self):
+        m = Mesh([[0, 1, 0], [-1, 0, 0], [1, 0, 0], [0, 1, 1], [-1, 0, 1], [1, 0, 1]], [[0, 1, 2], [3, 4, 5]])
+        m.material.transparency = 1
+        m.material.refractive_index = 1.5
+        xs = m.intersect(Ray(Point(0, 0.5, -2), Vector(0, 0, 1)))
+        self.assertIsNot(xs[0].obj, xs[1].obj)
+        self.assertEqual(xs[0].refractive_indices(xs), (1, 1.5))
+        self.assertEqual(xs[1].refractive_indices(xs), (1.5, 1))
+
+    def test_mesh_in_world_accelerator(self):
+        w = World()
+        w.light = Light(Point(-10, 10, -10), Color(1, 1, 1))
+        vertices, faces = random_mesh(50, 3)
+        m = Mesh(vertices, faces)
+        w.objects = [m, Sphere()]
+        self.assertEqual(w.accelerator().unbounded, [])
+        r = Ray(Point(0, 0, -20), Vector(0, 0, 1))
+        self.assertEqual(w.closest_hit(r).t, Intersections(*m.intersect(r), *w.objects[1].intersect(r)).hit().t)
@@ -0,0 +1,153 @@
+import os
+import tempfile
+import unittest
+
+import numpy as np
+
+from features.mesh import Mesh
+from features.obj_file import ObjFile, DEFAULT_GROUP
+from features.ray import Ray
+from features.tuple import Point, Vector
+
+
+class TestObjFile(unittest.TestCase):
+    def test_ignoring_unrecognized_lines(self):
+        gibberish = """There was a young lady named Bright
+who traveled much faster than light.
+She set out one day
+in a relative way,
+and came back the previous night."""
+        obj = ObjFile.parse(gibberish.splitlines())
+        self.assertEqual(obj.ignored, 5)
+        self.assertEqual(len(obj.vertices), 0)
+
+    def test_vertex_records(self):
+        obj = ObjFile.parse("""v -1 1 0
+v -1.0000 0.5000 0.0000
+v 1 0 0
+v 1 1 0""".splitlines())
+        np.testing.assert_array_equal(obj.vertices, [[-1, 1, 0], [-1, 0.5, 0], [1, 0, 0], [1, 1, 0]])
+
+    def test_triangle_faces(self):
+        obj = ObjFile.parse("""v -1 1 0
+v -1 0 0
+v 1 0 0
+v 1 1 0
+
+f 1 2 3
+f 1 3 4""".splitlines())
+        faces, face_normals = obj.groups[DEFAULT_GROUP]
+        np.testing.assert_array_equal(faces, [[0, 1, 2], [0, 2, 3]])
+        np.testing.assert_array_equal(face_normals, [[-1, -1, -1], [-1, -1, -1]])
+
+    def test_triangulating_polygons(self):
+        obj = ObjFile.parse("""v -1 1 0
+v -1 0 0
+v 1 0 0
+v 1 1 0
+v 0 2 0
+
+f 1 2 3 4 5""".splitlines())
+        np.testing.assert_array_equal(obj.groups[DEFAULT_GROUP][0], [[0, 1, 2], [0, 2, 3], [0, 3, 4]])
+
+    def test_named_groups(self):
+        obj = ObjFile.parse("""v -1 1 0
+v -1 0 0
+v 1 0 0
+v 1 1 0
+g FirstGroup
+f 1 2 3
+g SecondGroup
+f 1 3 4""".splitlines())
+        np.testing.assert_array_equal(obj.groups['FirstGroup'][0], [[0, 1, 2]])
+        np.testing.assert_array_equal(obj.groups['SecondGroup'][0], [[0, 2, 3]])
+        g = obj.to_group()
+        self.assertEqual(len(g.shapes), 2)
+        self.assertIsInstance(g.shapes[0], Mesh)
+        self.assertIs(g.shapes[0].parent, g)
+
+    def test_vertex_normals_and_relative_indices(self):
+        obj = ObjFile.parse("""v 0 1 0
+v -1 0 0
+v 1 0 0
+vn -1 0 0
+vn 1 2 3
+vn 0 1 0
+f 1//3 2//1 3//2
+f -3/0/-1 -2/0/-3 -1/0/-2
+f 1 2 3""".splitlines())
+        np.testing.assert_array_equal(obj.normals, [[-1, 0, 0], [1, 2, 3], [0, 1, 0]])
+        np.testing.assert_array_equal(obj.groups[DEFAULT_GROUP][0], [[0, 1, 2]] * 3)
+        np.testing.assert_array_equal(obj.groups[DEFAULT_GROUP][1], [[2, 0, 1], [2, 0, 1], [-1, -1, -1]])
+
+        m = obj.mesh()
+        np.testing.assert_array_equal(sorted(map(tuple, m.normals[:, 0])), [(0, 0, -1), (0, 1, 0), (0, 1, 0)])
+
+    def test_bad_index(self):
+        with self.assertRaises(Exception):
+            ObjFile.parse(["v 0 1 0", "f 1 2 3"])
+
+    def test_cache(self):
+        source = """v 0 1 0
+v -1 0 0
+v 1 0 0
+v 0 0 1
+vn 0 0 -1
+g front
+f 1//1 2//1 3//1
+g back
+f 1 2 4
+"""
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.obj')
+            with open(path, 'w') as f:
+                f.write(source)
+            parsed = ObjFile.load(path)
+            self.assertTrue(os.path.exists(path + '.cache'))
+
+            cached = ObjFile.read_cache(path)
+            self.assertIsInstance(cached.vertices, np.memmap)
+            self.assertEqual(list(cached.groups), [DEFAULT_GROUP, 'front', 'back'])
+            np.testing.assert_array_equal(cached.vertices, parsed.vertices)
+            np.testing.assert_array_equal(cached.normals, parsed.normals)
+            for name in parsed.groups:
+                np.testing.assert_array_equal(cached.groups[name][0], parsed.groups[name][0])
+                np.testing.assert_array_equal(cached.groups[name][1], parsed.groups[name][1])
+            hit = cached.to_group().closest_hit(Ray(Point(0, 0.5, -5), Vector(0, 0, 1)))
+            self.assertEqual(hit.t, 5)
+
+            with open(path, 'a') as f:
+                f.write("f 1 3 4\n")
+            self.assertIsNone(ObjFile.read_cache(path))
+            self.assertEqual(len(ObjFile.load(path).groups['back'][0]), 2)
+            self.assertEqual(len(ObjFile.read_cache(path).groups['back'][0]), 2)
+
+    def test_damaged_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.obj')
+            with open(path, 'w') as f:
+                f.write("v 0 1 0\nv -1 0 0\nv 1 0 0\nf 1 2 3\n")
+            ObjFile.load(path)
+            size = os.path.getsize(path + '.cache')
+            os.truncate(path + '.cache', size - 30)
+            self.assertIsNone(ObjFile.read_cache(path))
+            self.assertEqual(len(ObjFile.load(path).groups[DEFAULT_GROUP][0]), 1)
+            self.assertEqual(os.path.getsize(path + '.cache'), size)
+
+            with open(path + '.cache', 'r+b') as f:
+                f.seek(8)
+                length = int.from_bytes(f.read(8), 'little')
+                f.write(b'{"other": 1}'.ljust(length))
+            self.assertIsNone(ObjFile.read_cache(path))
+            self.assertEqual(len(ObjFile.load(path).groups[DEFAULT_GROUP][0]), 1)
+            self.assertIsNotNone(ObjFile.read_cache(path))
+
+    def test_unwritable_cache(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'model.obj')
+            with open(path, 'w') as f:
+                f.write("v 0 1 0\nv -1 0 0\nv 1 0 0\nf 1 2 3\n")
+            os.mkdir(path + '.cache')
+            obj = ObjFile.load(path)
+            self.assertEqual(len(obj.groups[DEFAULT_GROUP][0]), 1)
+            self.assertEqual(sorted(os.listdir(directory)), ['model.obj', 'model.obj.cache'])
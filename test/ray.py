@@ -31,3 +31,9 @@ class TestRay(unittest.TestCase):
         r2 = r.transform(m)
         self.assertEqual(r2.origin, Point(2, 6, 12))
         self.assertEqual(r2.direction, Vector(0, 3, 0))
+
+    def test_inv_direction(self):
+        r = Ray(Point(1, 2, 3), Vector(4, -0.5, 0))
+        self.assertEqual(r.inv_direction, (0.25, -2, float('inf')))
+        self.assertIs(r.inv_direction, r.inv_direction)
+        self.assertEqual(r.transform(Scaling(2, 2, 2)).inv_direction, (0.125, -1, float('inf')))
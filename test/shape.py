@@ -6,7 +6,7 @@ from features.material import Material
 from features.matrix import Translation, Scaling, Matrix, Rotation
 from features.ray import Ray
 from features.shape import Sphere, Test, Plane, Cube, Cylinder, Cone, Triangle
-from features.tuple import Point, Vector
+from features.tuple import Point, Vector, TupleArray
 
 
 class TestShape(unittest.TestCase):
@@ -73,6 +73,14 @@ class TestShape(unittest.TestCase):
         self.assertEqual(s.saved_ray.origin, Point(0, 0, -2.5))
         self.assertEqual(s.saved_ray.direction, Vector(0, 0, 0.5))
 
+    def test_any_hit_scaled_shape(self):
+        s = Sphere()
+        s.set_transform(Scaling(2, 2, 2))
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertTrue(s.any_hit(r, 3.5))
+        self.assertFalse(s.any_hit(r, 3))
+        self.assertTrue(s.any_hit(Ray(Point(0, 0, 0), Vector(0, 0, 1)), 2.5))
+
     def test_intersecting_translated_shape(self):
         s = Test()
         s.set_transform(Translation(5, 0, 0))
@@ -80,6 +88,15 @@ class TestShape(unittest.TestCase):
         self.assertEqual(s.saved_ray.origin, Point(-5, 0, -5))
         self.assertEqual(s.saved_ray.direction, Vector(0, 0, 1))
 
+    def test_reassigning_transformation(self):
+        s = Test()
+        s.set_transform(Scaling(2, 2, 2))
+        s.intersect(Ray(Point(0, 0, -5), Vector(0, 0, 1)))
+        s.transform = Translation(5, 0, 0)
+        s.intersect(Ray(Point(0, 0, -5), Vector(0, 0, 1)))
+        self.assertEqual(s.saved_ray.origin, Point(-5, 0, -5))
+        self.assertEqual(s.normal_at(Point(6, 0, 0)), Vector(1, 0, 0))
+
     def test_normal_x(self):
         self.assertEqual(Sphere().normal_at(Point(1, 0, 0)), Vector(1, 0, 0))
 
@@ -315,3 +332,77 @@ class TestShape(unittest.TestCase):
         xs = t.intersect(Ray(Point(0, 0.5, -2), Vector(0, 0, 1)))
         self.assertEqual(xs.count, 1)
         self.assertEqual(xs[0].t, 2)
+
+
+def random_rays(count, seed, spread=3):
+    rng = np.random.default_rng(seed)
+    origins = TupleArray.points(rng.uniform(-spread, spread, (count, 3)))
+    directions = TupleArray.vectors(rng.normal(size=(count, 3))).normalize()
+    return origins, directions
+
+
+class TestShapePacket(unittest.TestCase):
+    def assertPacketMatches(self, shape, origins, directions):
+        t, hit = shape.intersect_packet(origins, directions)
+        self.assertEqual(t.shape, hit.shape)
+        self.assertEqual(len(t), len(origins))
+        for i in range(len(origins)):
+            xs = shape.intersect(Ray(origins[i], directions[i]))
+            expected = sorted(x.t for x in xs)
+            np.testing.assert_allclose(sorted(t[i][hit[i]]), expected, rtol=1e-9, atol=1e-9)
+            self.assertTrue(np.all(np.isinf(t[i][~hit[i]])))
+
+    def test_sphere_packet(self):
+        s = Sphere()
+        t, hit = s.intersect_packet(TupleArray.points([[0, 0, -5], [0, 1, -5], [0, 2, -5], [0, 0, 0]]),
+                                    TupleArray.vectors([[0, 0, 1]] * 4))
+        np.testing.assert_array_equal(hit[:, 0], [True, True, False, True])
+        np.testing.assert_array_equal(t[[0, 1, 3]], [[4, 6], [5, 5], [-1, 1]])
+        self.assertTrue(np.all(np.isinf(t[2])))
+
+    def test_sphere_packet_matches_scalar(self):
+        s = Sphere()
+        s.set_transform(Translation(0.5, -0.25, 1) * Scaling(1.5, 0.75, 1))
+        self.assertPacketMatches(s, *random_rays(500, 1))
+
+    def test_plane_packet_matches_scalar(self):
+        p = Plane()
+        p.set_transform(Translation(0, -1, 0) * Rotation(np.pi / 7, 0, np.pi / 5))
+        self.assertPacketMatches(p, *random_rays(300, 2))
+        t, hit = p.local_intersect_packet(TupleArray.points([[0, 10, 0]]), TupleArray.vectors([[0, 0, 1]]))
+        self.assertFalse(hit[0, 0])
+
+    def test_cube_packet_matches_scalar(self):
+        c = Cube()
+        c.set_transform(Rotation(0.3, 0.2, 0.1) * Scaling(1, 2, 0.5))
+        self.assertPacketMatches(c, *random_rays(500, 3))
+        t, hit = c.local_intersect_packet(TupleArray.points([[5, 0.5, 0], [2, 0, 2]]),
+                                          TupleArray.vectors([[-1, 0, 0], [0, 0, -1]]))
+        np.testing.assert_array_equal(t[0], [4, 6])
+        self.assertFalse(hit[1].any())
+
+    def test_cylinder_packet_matches_scalar(self):
+        for cy in [Cylinder(), Cylinder(minimum=-1, maximum=1), Cylinder(minimum=-1, maximum=1, closed=True)]:
+            cy.set_transform(Rotation(0.4, 0, 0.2))
+            self.assertPacketMatches(cy, *random_rays(500, 4))
+        t, hit = Cylinder(minimum=1, maximum=2, closed=True).local_intersect_packet(
+            TupleArray.points([[0, 3, 0]]), TupleArray.vectors([[0, -1, 0]]))
+        np.testing.assert_array_equal(hit[0], [False, False, True, True])
+
+    def test_cone_packet_matches_scalar(self):
+        for co in [Cone(), Cone(minimum=-1, maximum=0.5), Cone(minimum=-0.5, maximum=0.5, closed=True)]:
+            co.set_transform(Rotation(0.1, 0.7, 0))
+            self.assertPacketMatches(co, *random_rays(500, 5))
+        t, hit = Cone().local_intersect_packet(TupleArray.points([[0, 0, -1]]),
+                                               TupleArray.vectors([[0, 1, 1]]).normalize())
+        np.testing.assert_array_equal(hit[0], [True, False, False, False])
+        self.assertAlmostEqual(t[0, 0], 0.35355, places=5)
+
+    def test_triangle_packet_matches_scalar(self):
+        tri = Triangle(Point(0, 1, 0), Point(-1, 0, 0), Point(1, 0, 0))
+        tri.set_transform(Translation(0, 0, 1) * Scaling(2, 2, 2))
+        self.assertPacketMatches(tri, *random_rays(500, 6, spread=1.5))
+        t, hit = tri.local_intersect_packet(TupleArray.points([[0, 0.5, -2], [0, -1, -2]]),
+                                            TupleArray.vectors([[0, 0, 1], [0, 0, 1]]))
+        np.testing.assert_array_equal(hit[:, 0], [True, False])
+        self.assertEqual(t[0, 0], 2)
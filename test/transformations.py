@@ -87,3 +87,70 @@ class TestTransformations(unittest.TestCase):
             ]
         )
         self.assertEqual(view_transform(Point(1, 3, 2), Point(4, -2, 8), Vector(1, 1, 0)), expected)
+
+    def test_transform_point(self):
+        m = Translation(10, 5, 7) * Scaling(5, 5, 5) * Rotation(np.pi / 2, 0, 0)
+        p = m.transform_point(Point(1, 0, 1))
+        self.assertIsInstance(p, Point)
+        self.assertEqual(p, Point(15, 0, 7))
+        self.assertEqual(p, m * Point(1, 0, 1))
+
+    def test_transform_vector(self):
+        m = Translation(10, 5, 7) * Scaling(2, 3, 4)
+        v = m.transform_vector(Vector(-4, 6, 8))
+        self.assertIsInstance(v, Vector)
+        self.assertEqual(v, Vector(-8, 18, 32))
+
+    def test_transform_after_mutation(self):
+        m = Translation(5, -3, 2)
+        self.assertEqual(m.transform_point(Point(0, 0, 0)), Point(5, -3, 2))
+        m[0, 3] = 1
+        self.assertEqual(m.transform_point(Point(0, 0, 0)), Point(1, -3, 2))
+
+    def test_affine_structure(self):
+        self.assertTrue(Translation(1, 2, 3).affine)
+        self.assertTrue((Rotation(0, np.pi / 4, 0) * Scaling(1, 2, 3) * Shearing(1, 0, 0, 0, 0, 1)).affine)
+        self.assertTrue(view_transform(Point(1, 3, 2), Point(4, -2, 8), Vector(1, 1, 0)).affine)
+        self.assertFalse(Matrix([[1, 2, 3, 4], [2, 4, 4, 2], [8, 6, 4, 1], [0, 0, 0, 1]]).affine)
+        self.assertFalse((Translation(1, 2, 3) * 2.0).affine)
+
+    def test_closed_form_inverses(self):
+        transforms = [Translation(5, -3, 2), Scaling(2, -3, 0.5), Rotation(np.pi / 3, np.pi / 5, -np.pi / 7),
+                      Shearing(1, 0.5, 0, 2, 0, 1), view_transform(Point(1, 3, 2), Point(4, -2, 8), Vector(1, 1, 0)),
+                      Translation(1, 2, 3) * Rotation(0, np.pi / 6, np.pi / 4) * Scaling(0.25, 1, 0.25)]
+        for m in transforms:
+            self.assertEqual(m.inverse(), Matrix(np.linalg.inv(m.matrix)))
+            self.assertIs(m.inverse().inverse(), m)
+
+    def test_composed_inverse_reversed(self):
+        a = Rotation(np.pi / 2, 0, 0)
+        b = Translation(10, 5, 7)
+        self.assertEqual((b * a).inverse(), a.inverse() * b.inverse())
+        self.assertEqual((b * a).inverse() * Point(15, 0, 7), Point(5, 0, 5))
+
+    def test_factor_mutated_after_composition(self):
+        a = Translation(1, 2, 3)
+        b = a * Scaling(2, 2, 2)
+        a[0, 3] = 5
+        self.assertEqual(b * b.inverse(), Matrix.identity(4))
+        self.assertEqual(b.inverse(), Matrix(np.linalg.inv(b.matrix)))
+
+    def test_mutated_after_inverting(self):
+        t = Translation(1, 2, 3)
+        ti = t.inverse()
+        t[0, 3] = 5
+        self.assertEqual(ti.inverse(), Translation(1, 2, 3))
+        self.assertEqual(t.inverse(), Translation(-5, -2, -3))
+        self.assertIs(t.inverse().inverse(), t)
+
+    def test_singular_affine(self):
+        with self.assertRaises(Exception):
+            Scaling(1, 0, 1).inverse()
+        with self.assertRaises(Exception):
+            Shearing(1, 0, 1, 0, 0, 0).inverse()
+
+    def test_mutated_rotation_inverse(self):
+        m = Rotation(np.pi / 4, 0, 0)
+        m[0, 0] = 2
+        self.assertFalse(m.affine)
+        self.assertEqual(m * m.inverse(), Matrix.identity(4))
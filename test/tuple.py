@@ -1,6 +1,9 @@
 import unittest
 import math
 
+import numpy as np
+
+from features.matrix import Translation, Scaling, Rotation
 from features.tuple import *
 
 
@@ -68,3 +71,79 @@ class TestTuples(unittest.TestCase):
 
     def test_reflect_slant(self):
         self.assertEqual(Vector(0, -1, 0).reflect(Vector((2 ** -0.5), (2 ** -0.5), 0)), Vector(1, 0, 0))
+
+    def test_compact_layout(self):
+        p = Point(1, 2, 3)
+        self.assertFalse(hasattr(p, '__dict__'))
+        with self.assertRaises(AttributeError):
+            p.u = 0
+
+    def test_add_scaled(self):
+        p = Point(1, 2, 3)
+        self.assertEqual(p.add_scaled(Vector(1, 0, -1), 2), Point(3, 2, 1))
+        self.assertEqual(p, Point(1, 2, 3))
+
+    def test_sub_normalize(self):
+        v = Point(1, 2, 3).sub_normalize(Point(1, 2, -1))
+        self.assertIsInstance(v, Vector)
+        self.assertEqual(v, Vector(0, 0, 1))
+        self.assertEqual(Point(1, 2, 3).sub_normalize(Point(1, 2, 3)), Vector(0, 0, 0))
+
+    def test_in_place(self):
+        v = Vector(1, 2, 3)
+        self.assertIs(v.iadd(Vector(1, 1, 1)), v)
+        self.assertEqual(v, Vector(2, 3, 4))
+        v.isub(Vector(2, 2, 2)).imul(2)
+        self.assertEqual(v, Vector(0, 2, 4))
+        v.iadd_scaled(Vector(1, 0, 0), 0.5)
+        self.assertEqual(v, Vector(0.5, 2, 4))
+        p = Point(0, 0, 0)
+        self.assertIs(p.set_add_scaled(Point(1, 2, 3), Vector(1, 0, -1), 2), p)
+        self.assertEqual(p, Point(3, 2, 1))
+
+
+class TestTupleArray(unittest.TestCase):
+    def setUp(self):
+        self.points = TupleArray.points([[1, 2, 3], [-1, 0, 4], [0, 0, 0]])
+        self.vectors = TupleArray.vectors([[1, 2, 3], [4, 0, 0], [0, 0, 0]])
+
+    def test_creation(self):
+        self.assertEqual(len(self.points), 3)
+        self.assertEqual(self.points.data.shape, (3, 4))
+        self.assertEqual(self.points[1], Point(-1, 0, 4))
+        self.assertEqual(self.vectors[0], Vector(1, 2, 3))
+        self.assertEqual(TupleArray.from_tuples([Point(1, 2, 3), Point(-1, 0, 4), Point(0, 0, 0)]), self.points)
+        self.assertEqual(list(self.vectors)[1], Vector(4, 0, 0))
+
+    def test_arithmetic(self):
+        self.assertEqual(self.points - self.vectors, TupleArray.points([[0, 0, 0], [-5, 0, 4], [0, 0, 0]]))
+        self.assertEqual(self.points + Vector(1, 1, 1), TupleArray.points([[2, 3, 4], [0, 1, 5], [1, 1, 1]]))
+        self.assertEqual(-self.vectors, TupleArray.vectors([[-1, -2, -3], [-4, 0, 0], [0, 0, 0]]))
+        self.assertEqual(self.vectors * 2, TupleArray.vectors([[2, 4, 6], [8, 0, 0], [0, 0, 0]]))
+        self.assertEqual(self.vectors * np.array([1, 0.5, 2]), TupleArray.vectors([[1, 2, 3], [2, 0, 0], [0, 0, 0]]))
+        self.assertEqual(self.vectors / 2, TupleArray.vectors([[0.5, 1, 1.5], [2, 0, 0], [0, 0, 0]]))
+
+    def test_magnitude_normalize(self):
+        np.testing.assert_allclose(self.vectors.magnitude(), [math.sqrt(14), 4, 0])
+        normalized = self.vectors.normalize()
+        for i, v in enumerate(self.vectors):
+            self.assertEqual(normalized[i], v.normalize())
+
+    def test_dot_cross_reflect(self):
+        other = TupleArray.vectors([[2, 3, 4], [0, 1, 0], [1, 1, 1]])
+        np.testing.assert_allclose(self.vectors.dot(other), [20, 0, 0])
+        np.testing.assert_allclose(self.vectors.dot(Vector(1, 1, 1)), [6, 4, 0])
+        crossed = self.vectors.cross(other)
+        reflected = self.vectors.reflect(other.normalize())
+        for i, (v, o) in enumerate(zip(self.vectors, other)):
+            self.assertEqual(crossed[i], v.cross(o))
+            self.assertEqual(reflected[i], v.reflect(o.normalize()))
+
+    def test_matrix_application(self):
+        m = Translation(10, 5, 7) * Scaling(5, 5, 5) * Rotation(np.pi / 2, 0, 0)
+        points = m * self.points
+        vectors = m * self.vectors
+        self.assertIsInstance(points, TupleArray)
+        for i in range(3):
+            self.assertEqual(points[i], m * self.points[i])
+            self.assertEqual(vectors[i], m * self.vectors[i])
@@ -1,6 +1,6 @@
 import unittest
 
-from features.intersection import Intersection, Intersections
+from features.intersection import Intersection, Intersections, ComputationsPool
 from features.light import Light
 from features.material import Material
 from features.matrix import Scaling, Translation
@@ -36,6 +36,14 @@ class TestWorld(unittest.TestCase):
         self.assertEqual(intersections[2].t, 5.5)
         self.assertEqual(intersections[3].t, 6)
 
+    def test_intersect_record(self):
+        w = World.default()
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        record = w.intersect_record(r)
+        self.assertEqual(sorted(record.ts), [4, 4.5, 5.5, 6])
+        self.assertEqual(record.hit().t, w.intersect(r).hit().t)
+        self.assertIs(record.hit().obj, w.objects[0])
+
     def test_shading(self):
         w = World.default()
         c = w.shade_hit(Intersection(4, w.objects[0]).prepare_computations(Ray(Point(0, 0, -5), Vector(0, 0, 1))))
@@ -77,6 +85,67 @@ class TestWorld(unittest.TestCase):
         w = World.default()
         self.assertFalse(w.is_shadowed(Point(-2, 2, -2)))
 
+    def test_accelerator(self):
+        w = World.default()
+        accelerator = w.accelerator()
+        self.assertIs(w.accelerator(), accelerator)
+        self.assertEqual(sorted(map(id, accelerator.shapes)), sorted(map(id, w.objects)))
+
+        floor = Plane()
+        w.objects.append(floor)
+        self.assertIsNot(w.accelerator(), accelerator)
+        self.assertEqual(w.accelerator().unbounded, [floor])
+
+    def test_accelerator_follows_changes(self):
+        w = World.default()
+        r = Ray(Point(5, 0, -5), Vector(0, 0, 1))
+        self.assertIsNone(w.closest_hit(r))
+        w.objects[1].set_transform(Translation(5, 0, 0))
+        self.assertEqual(w.closest_hit(r).t, 4)
+        w.objects[1].transform = Translation(0, 5, 0)
+        self.assertIsNone(w.closest_hit(r))
+
+        s = Sphere()
+        s.set_transform(Translation(5, 0, 0))
+        w.objects = [s]
+        self.assertIs(w.closest_hit(r).obj, s)
+        del w.objects[0]
+        self.assertIsNone(w.closest_hit(r))
+        self.assertEqual(w.intersect(r), [])
+
+    def test_accelerator_follows_in_place_edits(self):
+        w = World.default()
+        r = Ray(Point(5, 0, -5), Vector(0, 0, 1))
+        w.objects[1].set_transform(Translation(0, 5, 0))
+        self.assertIsNone(w.closest_hit(r))
+        w.objects[1].transform[0, 3] = 5
+        w.objects[1].transform[1, 3] = 0
+        self.assertEqual(w.closest_hit(r).t, 4)
+
+    def test_accelerator_kept_when_building_shapes(self):
+        w = World.default()
+        accelerator = w.accelerator()
+        Sphere(transform=Translation(1, 0, 0))
+        self.assertIs(w.accelerator(), accelerator)
+
+    def test_any_hit(self):
+        w = World.default()
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        self.assertTrue(w.any_hit(r, 10))
+        self.assertTrue(w.any_hit(r, 4.1))
+        self.assertFalse(w.any_hit(r, 4))
+        self.assertFalse(w.any_hit(Ray(Point(0, 0, 7), Vector(0, 0, 1)), 10))
+
+    def test_closest_hit(self):
+        w = World.default()
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        hit = w.closest_hit(r)
+        self.assertEqual(hit.t, 4)
+        self.assertIs(hit.obj, w.objects[0])
+        self.assertEqual(w.closest_hit(r, 4.7).t, 4)
+        self.assertIsNone(w.closest_hit(r, 4))
+        self.assertEqual(w.closest_hit(Ray(Point(0, 0, 0), Vector(0, 0, 1))).t, 0.5)
+
     def test_given_shadow_intersection(self):
         w = World()
         w.light = Light(Point(0, 0, -10), Color(1, 1, 1))
@@ -173,6 +242,35 @@ class TestWorld(unittest.TestCase):
         comps = xs[2].prepare_computations(Ray(Point(0, 0, 0.1), Vector(0, 1, 0)), xs)
         self.assertEqual(w.refracted_color(comps), Color(0, 0.99888, 0.04725))
 
+    def test_color_at_with_pool(self):
+        w = World.default()
+        self.assertIsInstance(w.pool, ComputationsPool)
+        r = Ray(Point(0, 0, -5), Vector(0, 0, 1))
+        w.pool = None
+        expected = w.color_at(r)
+        w.pool = ComputationsPool()
+        self.assertEqual(w.color_at(r), expected)
+        self.assertEqual(w.color_at(r), expected)
+        self.assertEqual(len(w.pool.free), 1)
+
+        w.objects[0].material.reflective = 0.5
+        r = Ray(Point(0, 0.5, -5), Vector(0, 0, 1))
+        w.pool = None
+        expected = w.color_at(r)
+        w.pool = ComputationsPool()
+        self.assertEqual(w.color_at(r), expected)
+        self.assertEqual(w.color_at(r), expected)
+
+    def test_color_at_refracts(self):
+        w = World.default()
+        s1 = w.objects[0]
+        s1.material.transparency = 1
+        r = Ray(Point(0, 0.7, -5), Vector(0, 0, 1))
+        s1.material.refractive_index = 1
+        straight = w.color_at(r)
+        s1.material.refractive_index = 1.5
+        self.assertNotEqual(w.color_at(r), straight)
+
     def test_shade_transparent_material(self):
         w = World.default()
         floor = Plane()